@@ -0,0 +1,136 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.http import Http404, HttpResponse, HttpResponseBadRequest
+from django.shortcuts import redirect
+
+from .catalogs import catalog_response, get_catalog
+from .ingredient_search import ingredient_index
+from .renderers import FastJSONRenderer
+from .response_cache import (LIST_NAMESPACES, detail_namespaces,
+                             entry_response, get_cached_entry)
+from .serializers import IngredientSerializer, TagSerializer
+from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+from recipes.constants import INGREDIENTS_NAMESPACE, TAGS_NAMESPACE
+from recipes.models import Ingredient, Tag
+from recipes.short_links import is_valid_slug, resolve
+
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+tag_views = TagViewSet.as_view({'get': 'list'})
+ingredient_views = IngredientViewSet.as_view({'get': 'list'})
+recipe_list_views = RecipeViewSet.as_view({'get': 'list', 'post': 'create'})
+recipe_detail_views = RecipeViewSet.as_view({
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+})
+
+
+def in_thread(func, thread_sensitive=False):
+    @wraps(func)
+    def call(*args, **kwargs):
+        try:
+            response = func(*args, **kwargs)
+            if callable(getattr(response, 'render', None)):
+                response.render()
+            return response
+        finally:
+            if not thread_sensitive:
+                connections.close_all()
+
+    return sync_to_async(call, thread_sensitive=thread_sensitive)
+
+
+async def delegate(view, request, *args, **kwargs):
+    if request.method in SAFE_METHODS:
+        return await in_thread(view)(request, *args, **kwargs)
+    return await in_thread(view, thread_sensitive=True)(
+        request, *args, **kwargs
+    )
+
+
+def render_json(data):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        content_type='application/json'
+    )
+
+
+def is_anonymous_read(request):
+    return (
+        request.method == 'GET'
+        and 'HTTP_AUTHORIZATION' not in request.META
+        and 'format' not in request.GET
+    )
+
+
+async def cached_or_delegate(request, namespaces, view, by_author=False,
+                             **kwargs):
+    if not is_anonymous_read(request):
+        return await delegate(view, request, **kwargs)
+    _, entry = await in_thread(get_cached_entry)(
+        request, namespaces, by_author
+    )
+    if entry is None:
+        return await delegate(view, request, **kwargs)
+    return entry_response(request, entry, render_json)
+
+
+async def tag_list(request):
+    if request.method != 'GET':
+        return await delegate(tag_views, request)
+    catalog = await in_thread(get_catalog)(
+        TAGS_NAMESPACE, Tag.objects.all(), TagSerializer
+    )
+    return catalog_response(request, catalog)
+
+
+async def ingredient_list(request):
+    if request.method != 'GET':
+        return await delegate(ingredient_views, request)
+    name = request.GET.get('name')
+    if name:
+        return render_json(await in_thread(ingredient_index.search)(name))
+    catalog = await in_thread(get_catalog)(
+        INGREDIENTS_NAMESPACE, Ingredient.objects.all(), IngredientSerializer
+    )
+    return catalog_response(request, catalog)
+
+
+async def recipe_list(request):
+    return await cached_or_delegate(
+        request, LIST_NAMESPACES, recipe_list_views
+    )
+
+
+async def recipe_detail(request, pk):
+    return await cached_or_delegate(
+        request,
+        detail_namespaces(pk),
+        recipe_detail_views,
+        by_author=True,
+        pk=pk
+    )
+
+
+tag_list.delegates_to = tag_views
+ingredient_list.delegates_to = ingredient_views
+recipe_list.delegates_to = recipe_list_views
+recipe_detail.delegates_to = recipe_detail_views
+recipe_list.csrf_exempt = True
+recipe_detail.csrf_exempt = True
+
+
+async def short_link(request, slug):
+    if not is_valid_slug(slug):
+        return HttpResponseBadRequest(
+            'Недопустимые символы в короткой ссылке.'
+        )
+    recipe_id = await in_thread(resolve)(slug)
+    if recipe_id is None:
+        raise Http404('Рецепт не найден.')
+    return redirect(f'/recipes/{recipe_id}/')
@@ -0,0 +1,118 @@
+import hashlib
+import pickle
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import SAFE_METHODS
+
+from .constants import (AUTH_CACHE_KEY, AUTH_CACHE_TIMEOUT,
+                        AUTH_LOCAL_CACHE_SIZE, AUTH_LOCAL_CACHE_TTL)
+from .images import variants_updated
+from foodgram.db_router import pin_client
+from recipes.cache import LocalCache
+from recipes.counters import counter_changed
+from recipes.signals import LOGIN_FIELDS
+from users.models import User
+
+
+class TokenCache:
+
+    def __init__(self, maxsize, ttl):
+        self.local = LocalCache(maxsize, ttl)
+
+    @staticmethod
+    def get_cache_key(key):
+        return AUTH_CACHE_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+    def get(self, key):
+        cache_key = self.get_cache_key(key)
+        payload = self.local.get(cache_key)
+        if payload is None:
+            payload = cache.get(cache_key)
+            if payload is None:
+                return None
+            self.local.set(cache_key, payload)
+        return pickle.loads(payload)
+
+    def set(self, key, user, token):
+        cache_key = self.get_cache_key(key)
+        payload = pickle.dumps((user, token))
+        cache.set(cache_key, payload, AUTH_CACHE_TIMEOUT)
+        self.local.set(cache_key, payload)
+
+    def delete(self, *keys):
+        cache_keys = [self.get_cache_key(key) for key in keys]
+        cache.delete_many(cache_keys)
+        for cache_key in cache_keys:
+            self.local.discard(cache_key)
+
+
+token_cache = TokenCache(AUTH_LOCAL_CACHE_SIZE, AUTH_LOCAL_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    use_cache = True
+
+    def authenticate(self, request):
+        self.use_cache = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key) if self.use_cache else None
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
+
+
+def invalidate_tokens(tokens):
+    keys = list(tokens.values_list('key', flat=True))
+    if keys:
+        transaction.on_commit(lambda: token_cache.delete(*keys))
+
+
+def invalidate_user(user_id):
+    invalidate_tokens(Token.objects.filter(user_id=user_id))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: token_cache.delete(instance.key))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and set(update_fields) <= LOGIN_FIELDS):
+        return
+    invalidate_user(instance.pk)
+
+
+@receiver(user_logged_in)
+def user_logged_in_handler(sender, request, user, **kwargs):
+    if not settings.REPLICA_DATABASES:
+        return
+    for key in Token.objects.filter(user=user).values_list('key', flat=True):
+        pin_client(f'{CachedTokenAuthentication.keyword} {key}')
+
+
+@receiver(user_logged_out)
+def user_logged_out_handler(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
+
+
+@receiver(variants_updated, sender=User)
+def user_variants_updated(sender, pk, **kwargs):
+    invalidate_user(pk)
+
+
+@receiver(counter_changed, sender=User)
+def user_counter_changed(sender, queryset, **kwargs):
+    invalidate_tokens(Token.objects.filter(user__in=queryset.values('pk')))
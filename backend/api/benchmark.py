@@ -0,0 +1,244 @@
+import json
+import math
+import os
+import resource
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .constants import (BENCHMARK_BATCH_SIZE, BENCHMARK_IMAGE,
+                        BENCHMARK_PERCENTILES)
+from .fast_serializers import RECIPE_VALUES, serialize_recipes
+from .metrics import QueryRecorder, current_recorder
+from .renderers import FastJSONRenderer
+from .serializers import RecipeSerializer
+from recipes.cache import bump_version
+from recipes.constants import RECIPES_NAMESPACE
+from recipes.data_generator import DataGenerator
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+
+def load_catalog():
+    for model, file_name in ((Tag, 'tags.json'),
+                             (Ingredient, 'ingredients.json')):
+        with open(settings.BASE_DIR / 'data' / file_name,
+                  encoding='utf-8') as file:
+            model.objects.bulk_create(
+                (model(**row) for row in json.load(file)),
+                batch_size=BENCHMARK_BATCH_SIZE,
+                ignore_conflicts=True
+            )
+
+
+def seed_dataset(rng, users, recipes, ingredients, favorites, carts,
+                 follows):
+    load_catalog()
+    DataGenerator(rng).generate(
+        users, recipes, ingredients, favorites, carts, follows
+    )
+
+
+def get_rss():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentile(values, rank):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(rank / 100 * len(ordered)) - 1)]
+
+
+class Benchmark:
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.user = User.objects.filter(
+            user_subscriptions__isnull=False,
+            shoppingcart_set__isnull=False,
+        ).distinct().first() or User.objects.first()
+        self.recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        self.ingredients = list(
+            Ingredient.objects.values('id', 'name')
+        )
+        self.tags = list(Tag.objects.values('id', 'slug'))
+        self.created = 0
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def recipe_payload(self):
+        self.created += 1
+        return {
+            'name': f'Новый рецепт {self.created}',
+            'text': 'Рецепт, созданный нагрузочным тестом.',
+            'cooking_time': self.rng.randint(1, 180),
+            'image': BENCHMARK_IMAGE,
+            'tags': [tag['id'] for tag in self.rng.sample(self.tags, 2)],
+            'ingredients': [
+                {'id': ingredient['id'], 'amount': self.rng.randint(1, 500)}
+                for ingredient in self.rng.sample(self.ingredients, 8)
+            ],
+        }
+
+    def own_recipe_url(self):
+        recipe = Recipe.objects.filter(author=self.user).first()
+        if recipe is None:
+            self.client.post(
+                reverse('recipe-list'), self.recipe_payload(), format='json'
+            )
+            recipe = Recipe.objects.filter(author=self.user).first()
+        return reverse('recipe-detail', args=(recipe.id,))
+
+    def scenarios(self):
+        tags = [tag['slug'] for tag in self.tags[:2]]
+        own_recipe_url = self.own_recipe_url()
+        return {
+            'recipe_list': lambda: self.anonymous.get(
+                reverse('recipe-list')
+            ),
+            'recipe_list_cached': lambda: self.anonymous.get(
+                reverse('recipe-list')
+            ),
+            'recipe_list_authenticated': lambda: self.client.get(
+                reverse('recipe-list')
+            ),
+            'recipe_list_tags': lambda: self.client.get(
+                reverse('recipe-list'), {'tags': tags}
+            ),
+            'recipe_list_favorited': lambda: self.client.get(
+                reverse('recipe-list'), {'is_favorited': 1}
+            ),
+            'recipe_list_in_cart': lambda: self.client.get(
+                reverse('recipe-list'), {'is_in_shopping_cart': 1}
+            ),
+            'recipe_detail': lambda: self.client.get(
+                reverse(
+                    'recipe-detail', args=(self.rng.choice(self.recipe_ids),)
+                )
+            ),
+            'subscriptions': lambda: self.client.get(
+                reverse('user-subscriptions'), {'recipes_limit': 3}
+            ),
+            'ingredient_search': lambda: self.anonymous.get(
+                reverse('ingredient-list'),
+                {'name': self.rng.choice(self.ingredients)['name'][:3]}
+            ),
+            'recipe_create': lambda: self.client.post(
+                reverse('recipe-list'), self.recipe_payload(), format='json'
+            ),
+            'recipe_update': lambda: self.client.patch(
+                own_recipe_url, self.recipe_payload(), format='json'
+            ),
+            'download_shopping_cart': lambda: self.client.get(
+                reverse('recipe-download-shopping-cart')
+            ),
+        }
+
+    def resets(self):
+        return {
+            'recipe_list': lambda: bump_version(RECIPES_NAMESPACE),
+        }
+
+    def measure(self, request, iterations, warmup, reset=None):
+        for _ in range(warmup):
+            if reset is not None:
+                reset()
+            consume(request())
+        latencies = []
+        queries = []
+        for _ in range(iterations):
+            if reset is not None:
+                reset()
+            recorder = QueryRecorder()
+            token = current_recorder.set(recorder)
+            try:
+                started = time.perf_counter()
+                response = request()
+                content = consume(response)
+                latencies.append(time.perf_counter() - started)
+            finally:
+                current_recorder.reset(token)
+            if response.status_code >= 400:
+                raise RuntimeError(f'{response.status_code}: {content[:200]}')
+            queries.append(recorder.count)
+        result = {
+            f'p{rank}_ms': round(percentile(latencies, rank) * 1000, 3)
+            for rank in BENCHMARK_PERCENTILES
+        }
+        result.update(
+            mean_ms=round(sum(latencies) / len(latencies) * 1000, 3),
+            queries=round(sum(queries) / len(queries), 2),
+            max_queries=max(queries),
+            rss_mb=round(get_rss() / 2 ** 20, 1),
+        )
+        return result
+
+    def run(self, iterations, warmup, only=None):
+        resets = self.resets()
+        return {
+            name: self.measure(request, iterations, warmup, resets.get(name))
+            for name, request in self.scenarios().items()
+            if not only or name in only
+        }
+
+
+def check_contract(users, recipe_ids):
+    request_factory = APIRequestFactory()
+    ordering = ('-pub_date', '-id')
+    mismatches = []
+    for user in (AnonymousUser(), *users):
+        request = Request(request_factory.get(reverse('recipe-list')))
+        request.user = user
+        expected = JSONRenderer().render(RecipeSerializer(
+            Recipe.objects.for_read(user).filter(
+                pk__in=recipe_ids
+            ).order_by(*ordering),
+            many=True,
+            context={'request': request}
+        ).data)
+        data = serialize_recipes(
+            Recipe.objects.with_user_flags(user).filter(
+                pk__in=recipe_ids
+            ).order_by(*ordering).values(*RECIPE_VALUES),
+            request
+        )
+        for name, actual in (
+            ('fast_serializers', JSONRenderer().render(data)),
+            ('fast_renderer', FastJSONRenderer().render(data)),
+        ):
+            if actual != expected:
+                mismatches.append(f'{name} ({user}): {len(actual)} байт '
+                                  f'вместо {len(expected)}')
+    return mismatches
+
+
+def consume(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get('results', {}).get(name)
+        if expected is None:
+            continue
+        for metric in ('p95_ms', 'queries'):
+            if result[metric] > expected[metric] * threshold + (
+                    1 if metric == 'queries' else 0):
+                regressions.append(
+                    f'{name}.{metric}: {expected[metric]} -> {result[metric]}'
+                )
+    return regressions
@@ -0,0 +1,62 @@
+import gzip
+import hashlib
+import re
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from .constants import CATALOG_CACHE_KEY, CATALOG_CACHE_TIMEOUT
+from recipes.cache import get_version
+
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+def build_catalog(queryset, serializer_class):
+    body = JSONRenderer().render(serializer_class(queryset, many=True).data)
+    digest = hashlib.sha256(body).hexdigest()
+    return {
+        'body': body,
+        'gzip': gzip.compress(body),
+        'etag': quote_etag(digest),
+        'gzip_etag': quote_etag(f'{digest}-gzip'),
+        'last_modified': int(time.time()),
+    }
+
+
+def get_catalog(namespace, queryset, serializer_class):
+    key = CATALOG_CACHE_KEY.format(namespace, get_version(namespace))
+    catalog = cache.get(key)
+    if catalog is None:
+        catalog = build_catalog(queryset, serializer_class)
+        cache.set(key, catalog, CATALOG_CACHE_TIMEOUT)
+    return catalog
+
+
+def catalog_response(request, catalog):
+    use_gzip = bool(
+        ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    )
+    etag = catalog['gzip_etag'] if use_gzip else catalog['etag']
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=catalog['last_modified']
+    )
+    if response is None:
+        response = HttpResponse(
+            catalog['gzip'] if use_gzip else catalog['body'],
+            content_type='application/json'
+        )
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(catalog['last_modified'])
+    patch_vary_headers(response, ('Accept-Encoding',))
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
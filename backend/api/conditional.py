@@ -0,0 +1,90 @@
+import hashlib
+from functools import partial
+
+from django.db.models import BooleanField, Exists, OuterRef, Value
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from recipes.cache import get_versions
+from recipes.constants import INGREDIENTS_NAMESPACE, TAGS_NAMESPACE
+from recipes.models import Recipe
+from users.models import Follow
+
+
+def make_etag(*parts):
+    state = ':'.join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(state.encode()).hexdigest())
+
+
+def get_recipe_validators(request, pk):
+    if not str(pk).isdigit():
+        return None
+    user = request.user
+    is_subscribed = (
+        Exists(Follow.objects.filter(user=user, author=OuterRef('author')))
+        if user.is_authenticated
+        else Value(False, output_field=BooleanField())
+    )
+    row = Recipe.objects.filter(pk=pk).with_user_flags(user).annotate(
+        is_subscribed=is_subscribed
+    ).values(
+        'updated_at',
+        'author__updated_at',
+        'is_favorited',
+        'is_in_shopping_cart',
+        'is_subscribed',
+    ).first()
+    if row is None:
+        return None
+    last_modified = max(row['updated_at'], row['author__updated_at'])
+    return {
+        'etag': make_etag(
+            pk,
+            user.pk,
+            *(row[key] for key in sorted(row)),
+            *get_versions(TAGS_NAMESPACE, INGREDIENTS_NAMESPACE)
+        ),
+        'last_modified': (
+            None if user.is_authenticated
+            else int(last_modified.timestamp())
+        ),
+    }
+
+
+def get_user_validators(request):
+    user = request.user
+    return {
+        'etag': make_etag(user.pk, user.updated_at),
+        'last_modified': None,
+    }
+
+
+def set_validators(request, response, validators):
+    response['ETag'] = validators['etag']
+    if validators['last_modified'] is not None:
+        response['Last-Modified'] = http_date(validators['last_modified'])
+    if request.user.is_authenticated:
+        patch_vary_headers(response, ('Authorization',))
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_response(request, validators, build):
+    if validators is None:
+        return build()
+    response = get_conditional_response(request, **validators)
+    if response is None:
+        response = build()
+    return set_validators(request, response, validators)
+
+
+class ConditionalRetrieveMixin:
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return conditional_response(
+            request,
+            get_recipe_validators(request, lookup),
+            partial(super().retrieve, request, *args, **kwargs)
+        )
@@ -1,2 +1,55 @@
 PAGE_SIZE = 6
 MIN_VALUE = 1
+SHOPPING_LIST_FILENAME = 'shopping_list'
+SHOPPING_LIST_TITLE = 'Список покупок'
+SHOPPING_LIST_FORMAT_PARAM = 'file_format'
+SHOPPING_LIST_DEFAULT_FORMAT = 'txt'
+PDF_PAGE_SIZE = (794, 1123)
+PDF_MARGIN = 60
+PDF_FONT_SIZE = 18
+PDF_LINE_HEIGHT = 28
+INGREDIENT_SEARCH_LIMIT = 50
+CATALOG_CACHE_KEY = 'foodgram:catalog:{}:{}'
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+PAGINATION_QUERY_PARAM = 'pagination'
+CURSOR_PAGINATION = 'cursor'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+MAX_QUERY_FINGERPRINTS = 500
+FINGERPRINT_SQL_LENGTH = 200
+METRICS_TOKEN_HEADER = 'HTTP_X_METRICS_TOKEN'
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+BENCHMARK_PERCENTILES = (50, 95, 99)
+BENCHMARK_BATCH_SIZE = 1000
+BENCHMARK_IMAGE = (
+    'data:image/png;base64,'
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVR4nGP4'
+    '//8/AAX+Av4N70a4AAAAAElFTkSuQmCC'
+)
+IMAGE_VARIANTS = (
+    ('thumbnail', (160, 160)),
+    ('card', (480, 480)),
+    ('full', (1600, 1600)),
+)
+IMAGE_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+)
+IMAGE_VARIANTS_DIR = 'variants'
+IMAGE_METADATA_KEYS = frozenset(
+    ('exif', 'xmp', 'XML:com.adobe.xmp', 'photoshop', 'comment')
+)
+IMAGE_ORIGINAL_OPTIONS = {
+    'JPEG': {'quality': 95},
+    'WEBP': {'quality': 95},
+}
+RESPONSE_CACHE_KEY = 'foodgram:response:{}'
+RESPONSE_CACHE_TIMEOUT = 60 * 10
+RESPONSE_CACHE_HEADER = 'X-Cache'
+AUTH_CACHE_KEY = 'foodgram:auth:{}'
+AUTH_CACHE_TIMEOUT = 60 * 5
+AUTH_LOCAL_CACHE_SIZE = 10000
+AUTH_LOCAL_CACHE_TTL = 10
+BULK_RECIPES_LIMIT = 100
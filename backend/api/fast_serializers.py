@@ -0,0 +1,154 @@
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import Http404
+from rest_framework.response import Response
+
+from .loaders import get_subscribed_author_ids
+from .serializers import (RecipeIngredientSerializer, RecipeSerializer,
+                          TagSerializer, UserSerializer, absolute_variants)
+from recipes.models import Recipe, RecipeIngredient
+from users.models import User
+
+
+RECIPE_VALUES = (
+    'id',
+    'author_id',
+    'name',
+    'image',
+    'image_variants',
+    'text',
+    'cooking_time',
+    'pub_date',
+    'is_favorited',
+    'is_in_shopping_cart',
+)
+INGREDIENT_VALUES = {
+    'id': 'ingredient_id',
+    'name': 'ingredient__name',
+    'measurement_unit': 'ingredient__measurement_unit',
+    'amount': 'amount',
+}
+
+
+@lru_cache(maxsize=None)
+def get_field_names(serializer_class):
+    return tuple(serializer_class().fields)
+
+
+def pick(serializer_class, values):
+    return {
+        name: values[name]
+        for name in get_field_names(serializer_class)
+        if name in values
+    }
+
+
+def build_url(request, name):
+    if not name:
+        return None
+    url = default_storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def serialize_authors(author_ids, request):
+    subscribed = get_subscribed_author_ids(request)
+    fields = [
+        name for name in get_field_names(UserSerializer)
+        if name != 'is_subscribed'
+    ]
+    return {
+        row['id']: pick(UserSerializer, {
+            **row,
+            'avatar': build_url(request, row['avatar']),
+            'avatar_variants': absolute_variants(
+                request, row['avatar_variants']
+            ),
+            'is_subscribed': row['id'] in subscribed,
+        })
+        for row in User.objects.filter(pk__in=author_ids).values(*fields)
+    }
+
+
+def serialize_tags(recipe_ids):
+    tags = defaultdict(list)
+    fields = get_field_names(TagSerializer)
+    for row in Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('tag__name').values(
+        'recipe_id', *(f'tag__{name}' for name in fields)
+    ):
+        tags[row['recipe_id']].append({
+            name: row[f'tag__{name}'] for name in fields
+        })
+    return tags
+
+
+def serialize_ingredients(recipe_ids):
+    ingredients = defaultdict(list)
+    for row in RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values('recipe_id', *INGREDIENT_VALUES.values()):
+        ingredients[row['recipe_id']].append(pick(
+            RecipeIngredientSerializer,
+            {name: row[field] for name, field in INGREDIENT_VALUES.items()}
+        ))
+    return ingredients
+
+
+def serialize_recipes(rows, request):
+    rows = list(rows)
+    if not rows:
+        return []
+    recipe_ids = [row['id'] for row in rows]
+    authors = serialize_authors(
+        {row['author_id'] for row in rows}, request
+    )
+    tags = serialize_tags(recipe_ids)
+    ingredients = serialize_ingredients(recipe_ids)
+    return [
+        pick(RecipeSerializer, {
+            **row,
+            'author': authors[row['author_id']],
+            'ingredients': ingredients[row['id']],
+            'tags': tags[row['id']],
+            'image': build_url(request, row['image']),
+            'image_variants': absolute_variants(
+                request, row['image_variants']
+            ),
+        })
+        for row in rows
+    ]
+
+
+def get_recipe_rows(user):
+    return Recipe.objects.with_user_flags(user)
+
+
+class FastRecipeReadMixin:
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READ_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(
+            get_recipe_rows(request.user)
+        ).values(*RECIPE_VALUES)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(serialize_recipes(queryset, request))
+        return self.get_paginated_response(
+            serialize_recipes(page, request)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = str(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        if not settings.FAST_READ_SERIALIZERS or not lookup.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        row = get_recipe_rows(request.user).filter(
+            pk=lookup
+        ).values(*RECIPE_VALUES).first()
+        if row is None:
+            raise Http404
+        return Response(serialize_recipes((row,), request)[0])
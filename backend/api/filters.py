@@ -29,6 +29,10 @@ class RecipeFilter(filters.FilterSet):
         method='filter_is_in_shopping_cart'
     )
 
+    search = filters.CharFilter(
+        method='filter_search'
+    )
+
     class Meta:
         model = Recipe
         fields = ('author',)
@@ -42,3 +46,9 @@ class RecipeFilter(filters.FilterSet):
         if value and self.request.user.is_authenticated:
             return queryset.filter(shoppingcart_set__user=self.request.user)
         return queryset
+
+    def filter_search(self, queryset, item, value):
+        value = value.strip()
+        if value:
+            return queryset.search(value)
+        return queryset
@@ -0,0 +1,140 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from .constants import (IMAGE_FORMATS, IMAGE_METADATA_KEYS,
+                        IMAGE_ORIGINAL_OPTIONS, IMAGE_VARIANTS,
+                        IMAGE_VARIANTS_DIR)
+from recipes.cache import bump_version
+
+
+logger = logging.getLogger(__name__)
+
+variants_updated = Signal()
+
+executor = (
+    ThreadPoolExecutor(
+        max_workers=settings.IMAGE_WORKERS,
+        thread_name_prefix='images'
+    )
+    if settings.IMAGE_WORKERS else None
+)
+
+
+def open_image(source):
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def strip_metadata(source):
+    with Image.open(source) as original:
+        image_format = original.format
+        if not IMAGE_METADATA_KEYS & original.info.keys():
+            return None
+        image = ImageOps.exif_transpose(original)
+    for key in IMAGE_METADATA_KEYS:
+        image.info.pop(key, None)
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        format=image_format,
+        exif=b'',
+        **IMAGE_ORIGINAL_OPTIONS.get(image_format, {})
+    )
+    return buffer.getvalue()
+
+
+def render_variants(source, name):
+    directory, file_name = os.path.split(name)
+    stem = os.path.splitext(file_name)[0]
+    image = open_image(source)
+    variants = {}
+    for variant, size in IMAGE_VARIANTS:
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        variants[variant] = {
+            'width': resized.width,
+            'height': resized.height,
+        }
+        for extension, image_format, options in IMAGE_FORMATS:
+            if image_format == 'WEBP' and not features.check('webp'):
+                continue
+            buffer = BytesIO()
+            resized.save(buffer, format=image_format, **options)
+            path = default_storage.save(
+                os.path.join(
+                    directory,
+                    IMAGE_VARIANTS_DIR,
+                    f'{stem}_{variant}.{extension}'
+                ),
+                ContentFile(buffer.getvalue())
+            )
+            variants[variant][extension] = default_storage.url(path)
+    return variants
+
+
+def variant_paths(variants):
+    prefix = default_storage.base_url
+    for variant in variants.values():
+        for extension, _, _ in IMAGE_FORMATS:
+            url = variant.get(extension)
+            if url and url.startswith(prefix):
+                yield url[len(prefix):]
+
+
+def process_image(model, pk, field, variants_field, namespaces=()):
+    try:
+        row = model.objects.filter(pk=pk).values(field, variants_field).first()
+        if not row or not row[field]:
+            return
+        name = row[field]
+        with default_storage.open(name) as source:
+            cleaned = strip_metadata(source)
+        path = name
+        if cleaned is not None:
+            default_storage.delete(name)
+            path = default_storage.save(name, ContentFile(cleaned))
+        with default_storage.open(path) as source:
+            variants = render_variants(source, path)
+        updated = model.objects.filter(pk=pk, **{field: name}).update(**{
+            field: path,
+            variants_field: variants,
+            'updated_at': timezone.now(),
+        })
+        if updated:
+            bump_version(*namespaces)
+            variants_updated.send(sender=model, pk=pk)
+        stale = variants if not updated else row[variants_field] or {}
+        for path in variant_paths(stale):
+            default_storage.delete(path)
+    except Exception:
+        logger.exception(
+            'Не удалось обработать изображение %s %s', model.__name__, pk
+        )
+    finally:
+        if executor is not None:
+            connections.close_all()
+
+
+def schedule_image_processing(instance, field, variants_field,
+                              namespaces=()):
+    args = (type(instance), instance.pk, field, variants_field, namespaces)
+    if executor is None:
+        transaction.on_commit(lambda: process_image(*args))
+    else:
+        transaction.on_commit(lambda: executor.submit(process_image, *args))
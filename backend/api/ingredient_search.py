@@ -0,0 +1,70 @@
+from bisect import bisect_left
+from threading import Lock
+
+from .constants import INGREDIENT_SEARCH_LIMIT
+from recipes.cache import get_version
+from recipes.constants import INGREDIENTS_NAMESPACE
+from recipes.models import Ingredient
+
+
+def normalize(value):
+    return value.strip().casefold().replace('ё', 'е')
+
+
+class IngredientIndex:
+    def __init__(self):
+        self.lock = Lock()
+        self.version = None
+        self.keys = ()
+        self.items = ()
+
+    def build(self):
+        rows = sorted(
+            (
+                (normalize(name), {
+                    'id': pk,
+                    'name': name,
+                    'measurement_unit': measurement_unit,
+                })
+                for pk, name, measurement_unit in (
+                    Ingredient.objects.values_list(
+                        'id', 'name', 'measurement_unit'
+                    )
+                )
+            ),
+            key=lambda row: (row[0], row[1]['id'])
+        )
+        return (
+            tuple(key for key, _ in rows),
+            tuple(item for _, item in rows),
+        )
+
+    def get_catalog(self):
+        version = get_version(INGREDIENTS_NAMESPACE)
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.keys, self.items = self.build()
+                    self.version = version
+        return self.keys, self.items
+
+    def search(self, query, limit=INGREDIENT_SEARCH_LIMIT):
+        query = normalize(query)
+        keys, items = self.get_catalog()
+        if not query:
+            return list(items[:limit])
+        start = bisect_left(keys, query)
+        end = start
+        while (end < len(keys) and end - start < limit
+               and keys[end].startswith(query)):
+            end += 1
+        result = list(items[start:end])
+        for index, key in enumerate(keys):
+            if len(result) >= limit:
+                break
+            if query in key and not key.startswith(query):
+                result.append(items[index])
+        return result
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,51 @@
+from collections import defaultdict
+
+from rest_framework import serializers
+
+from recipes.models import Recipe
+from users.models import Follow
+
+
+RECIPES_LIMIT_FIELD = serializers.IntegerField(min_value=1)
+
+
+def get_subscribed_author_ids(request):
+    if request is None or not request.user.is_authenticated:
+        return frozenset()
+    if not hasattr(request, '_subscribed_author_ids'):
+        request._subscribed_author_ids = frozenset(
+            Follow.objects.filter(
+                user=request.user
+            ).values_list('author_id', flat=True)
+        )
+    return request._subscribed_author_ids
+
+
+def get_recipes_limit(request):
+    if not hasattr(request, '_recipes_limit'):
+        limit = request.query_params.get('recipes_limit')
+        if limit:
+            try:
+                limit = RECIPES_LIMIT_FIELD.run_validation(limit)
+            except serializers.ValidationError as error:
+                raise serializers.ValidationError(
+                    {'recipes_limit': error.detail}
+                )
+        request._recipes_limit = limit or None
+    return request._recipes_limit
+
+
+def attach_latest_recipes(authors, limit=None):
+    recipes_by_author = defaultdict(list)
+    recipes = Recipe.objects.latest_by_author(
+        [author.pk for author in authors],
+        limit
+    ).only(
+        'id', 'name', 'image', 'image_variants', 'cooking_time', 'author',
+        'pub_date'
+    )
+    for recipe in recipes:
+        recipes_by_author[recipe.author_id].append(recipe)
+    for author in authors:
+        author.latest_recipes = recipes_by_author[author.pk]
+    return authors
@@ -0,0 +1,126 @@
+import json
+import platform
+import random
+import shutil
+import tempfile
+
+import django
+from django.core.management import BaseCommand, CommandError
+from django.test.utils import (override_settings, setup_databases,
+                               setup_test_environment, teardown_databases,
+                               teardown_test_environment)
+
+from api.benchmark import Benchmark, check_contract, compare, seed_dataset
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный тест API на синтетических данных в тестовой БД'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--ingredients', type=int, default=8,
+                            help='Ингредиентов в рецепте')
+        parser.add_argument('--favorites', type=int, default=20,
+                            help='Избранных рецептов у пользователя')
+        parser.add_argument('--carts', type=int, default=5,
+                            help='Рецептов в списке покупок пользователя')
+        parser.add_argument('--follows', type=int, default=10,
+                            help='Подписок у пользователя')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help='Запустить только указанные сценарии')
+        parser.add_argument('--output', help='Сохранить результат в JSON')
+        parser.add_argument('--baseline',
+                            help='Сравнить с сохранённым результатом')
+        parser.add_argument('--threshold', type=float, default=1.2,
+                            help='Допустимый рост p95 и числа запросов')
+        parser.add_argument('--check-contract', action='store_true',
+                            help='Сверить быстрые сериализаторы с DRF')
+
+    def check_contract(self, rng):
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        users = User.objects.filter(
+            user_subscriptions__isnull=False
+        ).distinct()[:3]
+        mismatches = check_contract(
+            users, rng.sample(recipe_ids, min(len(recipe_ids), 100))
+        )
+        if mismatches:
+            raise CommandError(
+                'Быстрые сериализаторы расходятся с DRF:\n'
+                + '\n'.join(mismatches)
+            )
+        self.stdout.write(
+            self.style.SUCCESS('Контракт сериализаторов соблюдён')
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        dataset = {
+            key: options[key]
+            for key in ('users', 'recipes', 'ingredients', 'favorites',
+                        'carts', 'follows', 'seed')
+        }
+        setup_test_environment()
+        databases = setup_databases(verbosity=0, interactive=False)
+        media_root = tempfile.mkdtemp()
+        isolated = override_settings(
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }},
+            MEDIA_ROOT=media_root,
+        )
+        isolated.enable()
+        try:
+            self.stdout.write('Заполнение тестовой базы...')
+            seed_dataset(rng, **{
+                key: value for key, value in dataset.items() if key != 'seed'
+            })
+            if options['check_contract']:
+                self.check_contract(rng)
+            results = Benchmark(rng).run(
+                options['iterations'],
+                options['warmup'],
+                options['scenarios']
+            )
+        finally:
+            isolated.disable()
+            shutil.rmtree(media_root, ignore_errors=True)
+            teardown_databases(databases, verbosity=0)
+            teardown_test_environment()
+        report = {
+            'meta': {
+                'dataset': dataset,
+                'iterations': options['iterations'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'results': results,
+        }
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<28} p50 {result["p50_ms"]:>9} ms  '
+                f'p95 {result["p95_ms"]:>9} ms  '
+                f'p99 {result["p99_ms"]:>9} ms  '
+                f'queries {result["queries"]:>6}  '
+                f'rss {result["rss_mb"]:>7} MB'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                regressions = compare(
+                    results, json.load(file), options['threshold']
+                )
+            if regressions:
+                raise CommandError(
+                    'Регрессия производительности:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий не найдено'))
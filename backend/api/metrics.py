@@ -0,0 +1,206 @@
+import hashlib
+import re
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from threading import Lock
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .constants import (FINGERPRINT_SQL_LENGTH, LATENCY_BUCKETS,
+                        MAX_QUERY_FINGERPRINTS, QUERY_COUNT_BUCKETS)
+
+
+SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+SQL_PLACEHOLDER_LISTS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+def fingerprint_sql(sql):
+    normalized = SQL_PLACEHOLDER_LISTS.sub(
+        '(...)', SQL_LITERALS.sub('?', sql)
+    )
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12], normalized
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(
+                f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+            )
+        cumulative += self.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total}')
+        lines.append(f'{name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+class QueryRecorder:
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add(sql, time.perf_counter() - started)
+
+    def add(self, sql, duration):
+        self.duration += duration
+        self.count += 1
+        self.fingerprints[sql] += 1
+        if self.parent is not None:
+            self.parent.add(sql, duration)
+
+    def duplicates(self):
+        return {
+            sql: count - 1
+            for sql, count in self.fingerprints.items()
+            if count > 1
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class ViewMetrics:
+
+    def __init__(self):
+        self.responses = Counter()
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.duplicates = Counter()
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.lock = Lock()
+        self.views = defaultdict(ViewMetrics)
+        self.statements = {}
+
+    def observe(self, view, status_code, latency, recorder):
+        duplicates = []
+        for sql, count in recorder.duplicates().items():
+            fingerprint, normalized = fingerprint_sql(sql)
+            duplicates.append((fingerprint, normalized, count))
+        with self.lock:
+            metrics = self.views[view]
+            metrics.responses[status_code] += 1
+            metrics.latency.observe(latency)
+            metrics.db_time.observe(recorder.duration)
+            metrics.queries.observe(recorder.count)
+            for fingerprint, normalized, count in duplicates:
+                if (fingerprint not in self.statements
+                        and len(self.statements) >= MAX_QUERY_FINGERPRINTS):
+                    continue
+                self.statements.setdefault(
+                    fingerprint, normalized[:FINGERPRINT_SQL_LENGTH]
+                )
+                metrics.duplicates[fingerprint] += count
+
+    def render(self):
+        with self.lock:
+            lines = [
+                '# HELP foodgram_requests_total Обработанные запросы.',
+                '# TYPE foodgram_requests_total counter',
+            ]
+            for view, metrics in self.views.items():
+                for status_code, count in metrics.responses.items():
+                    lines.append(
+                        'foodgram_requests_total'
+                        f'{{view="{escape(view)}",status="{status_code}"}} '
+                        f'{count}'
+                    )
+            for name, attribute, description in (
+                ('foodgram_request_duration_seconds', 'latency',
+                 'Время обработки запроса.'),
+                ('foodgram_db_duration_seconds', 'db_time',
+                 'Время выполнения SQL-запросов за запрос.'),
+                ('foodgram_db_queries', 'queries',
+                 'Количество SQL-запросов за запрос.'),
+            ):
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for view, metrics in self.views.items():
+                    lines.extend(getattr(metrics, attribute).render(
+                        name, f'view="{escape(view)}"'
+                    ))
+            lines.extend((
+                '# HELP foodgram_duplicate_queries_total '
+                'Повторные SQL-запросы с одинаковым отпечатком.',
+                '# TYPE foodgram_duplicate_queries_total counter',
+            ))
+            for view, metrics in self.views.items():
+                for fingerprint, count in metrics.duplicates.items():
+                    lines.append(
+                        'foodgram_duplicate_queries_total'
+                        f'{{view="{escape(view)}",'
+                        f'fingerprint="{fingerprint}"}} {count}'
+                    )
+            lines.extend((
+                '# HELP foodgram_query_fingerprint_info '
+                'Нормализованный текст SQL-запроса для отпечатка.',
+                '# TYPE foodgram_query_fingerprint_info gauge',
+            ))
+            for fingerprint, sql in self.statements.items():
+                lines.append(
+                    'foodgram_query_fingerprint_info'
+                    f'{{fingerprint="{fingerprint}",sql="{escape(sql)}"}} 1'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view = getattr(match.func, 'delegates_to', match.func)
+    view_class = getattr(view, 'cls', None)
+    if view_class is None:
+        return match.view_name or view.__name__
+    actions = getattr(view, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+registry = MetricsRegistry()
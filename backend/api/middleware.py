@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+from .metrics import (QueryRecorder, current_recorder, get_view_name,
+                      registry)
+from foodgram.db_router import pin_to_primary, reading_from, select_read_alias
+
+
+class QueryMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        recorder = QueryRecorder(current_recorder.get())
+        started = time.perf_counter()
+        token = current_recorder.set(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.observe(request, response, started, recorder)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder(current_recorder.get())
+        started = time.perf_counter()
+        token = current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.observe(request, response, started, recorder)
+        return response
+
+    @staticmethod
+    def observe(request, response, started, recorder):
+        registry.observe(
+            get_view_name(request),
+            response.status_code,
+            time.perf_counter() - started,
+            recorder
+        )
+
+
+def select_read_alias_in_thread(request):
+    try:
+        return select_read_alias(request)
+    finally:
+        connections.close_all()
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with reading_from(select_read_alias(request)):
+            response = self.get_response(request)
+        pin_to_primary(request, response)
+        return response
+
+    async def __acall__(self, request):
+        alias = await sync_to_async(
+            select_read_alias_in_thread, thread_sensitive=False
+        )(request)
+        with reading_from(alias):
+            response = await self.get_response(request)
+        await sync_to_async(pin_to_primary)(request, response)
+        return response
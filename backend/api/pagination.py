@@ -1,6 +1,46 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from .constants import CURSOR_PAGINATION, PAGINATION_QUERY_PARAM
 
 
 class PageLimitPagination(PageNumberPagination):
 
     page_size_query_param = 'limit'
+
+
+class CursorLimitPagination(CursorPagination):
+
+    page_size_query_param = 'limit'
+
+
+class RecipeCursorPagination(CursorLimitPagination):
+
+    ordering = ('-pub_date', 'id')
+
+
+class FeedCursorPagination(CursorLimitPagination):
+
+    ordering = ('-pub_date', '-recipe_id')
+
+
+class UserCursorPagination(CursorLimitPagination):
+
+    ordering = ('username', 'id')
+
+
+class CursorPaginationMixin:
+    cursor_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if (
+                self.cursor_pagination_class is not None
+                and self.request.query_params.get(
+                    PAGINATION_QUERY_PARAM
+                ) == CURSOR_PAGINATION
+            ):
+                self._paginator = self.cursor_pagination_class()
+            else:
+                return super().paginator
+        return self._paginator
@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from rest_framework import permissions
 
+from .constants import METRICS_TOKEN_HEADER
+
 
 class IsAuthorOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -9,3 +13,14 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return (obj.author == request.user
                 or request.method in permissions.SAFE_METHODS)
+
+
+class IsAdminOrMetricsToken(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_staff or bool(
+            settings.METRICS_TOKEN
+            and constant_time_compare(
+                request.META.get(METRICS_TOKEN_HEADER, ''),
+                settings.METRICS_TOKEN
+            )
+        )
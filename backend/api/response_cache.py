@@ -0,0 +1,124 @@
+import hashlib
+from functools import partial
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe, urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+from .constants import (RESPONSE_CACHE_HEADER, RESPONSE_CACHE_KEY,
+                        RESPONSE_CACHE_TIMEOUT)
+from recipes.cache import get_versions
+from recipes.constants import (INGREDIENTS_NAMESPACE, RECIPE_NAMESPACE,
+                               RECIPES_NAMESPACE, TAGS_NAMESPACE,
+                               USER_NAMESPACE, USERS_NAMESPACE)
+
+
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+LIST_NAMESPACES = (
+    RECIPES_NAMESPACE,
+    USERS_NAMESPACE,
+    TAGS_NAMESPACE,
+    INGREDIENTS_NAMESPACE,
+)
+
+
+def detail_namespaces(pk):
+    return RECIPE_NAMESPACE.format(pk), TAGS_NAMESPACE, INGREDIENTS_NAMESPACE
+
+
+def normalize_query(query_params):
+    return urlencode(sorted(
+        (key, value)
+        for key, values in query_params.lists()
+        for value in values
+        if value
+    ))
+
+
+def get_cache_key(request, versions):
+    raw = (
+        f'{request.scheme}://{request.get_host()}{request.path}'
+        f'?{normalize_query(request.GET)}|{versions}'
+    )
+    return RESPONSE_CACHE_KEY.format(
+        hashlib.sha256(raw.encode()).hexdigest()
+    )
+
+
+def get_author_version(author_id):
+    return get_versions(USER_NAMESPACE.format(author_id))[0]
+
+
+def get_cached_entry(request, namespaces, by_author=False):
+    key = get_cache_key(request, get_versions(*namespaces))
+    entry = cache.get(key)
+    if entry is not None and by_author and (
+        entry['author_version'] != get_author_version(entry['author_id'])
+    ):
+        entry = None
+    return key, entry
+
+
+def store_entry(key, response, by_author=False):
+    entry = {
+        'data': response.data,
+        'headers': {
+            header: response[header]
+            for header in VALIDATOR_HEADERS
+            if response.has_header(header)
+        },
+    }
+    if by_author:
+        entry['author_id'] = response.data['author']['id']
+        entry['author_version'] = get_author_version(entry['author_id'])
+    cache.set(key, entry, RESPONSE_CACHE_TIMEOUT)
+
+
+def entry_response(request, entry, make_response):
+    headers = entry['headers']
+    response = get_conditional_response(
+        request,
+        etag=headers.get('ETag'),
+        last_modified=parse_http_date_safe(headers.get('Last-Modified'))
+    ) or make_response(entry['data'])
+    for header, value in headers.items():
+        response[header] = value
+    response[RESPONSE_CACHE_HEADER] = 'HIT'
+    return response
+
+
+def cached_response(request, namespaces, build, by_author=False):
+    if request.method != 'GET' or request.user.is_authenticated:
+        return build()
+    key, entry = get_cached_entry(request, namespaces, by_author)
+    if entry is not None:
+        return entry_response(request, entry, Response)
+    response = build()
+    if response.status_code == status.HTTP_200_OK:
+        store_entry(key, response, by_author)
+    response[RESPONSE_CACHE_HEADER] = 'MISS'
+    return response
+
+
+class AnonymousCacheMixin:
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request,
+            LIST_NAMESPACES,
+            partial(super().list, request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = str(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        if not lookup.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        return cached_response(
+            request,
+            detail_namespaces(int(lookup)),
+            partial(super().retrieve, request, *args, **kwargs),
+            by_author=True
+        )
@@ -1,27 +1,50 @@
 from djoser.serializers import UserSerializer as UserBaseSerializer
 from drf_extra_fields.fields import Base64ImageField
+from django.db import transaction
 from rest_framework import serializers
 
-from .constants import MIN_VALUE
+from .constants import BULK_RECIPES_LIMIT, MIN_VALUE
+from .images import schedule_image_processing
+from .loaders import get_recipes_limit, get_subscribed_author_ids
+from recipes.cache import recipe_namespaces, user_namespaces
+from recipes.counters import change_counter
+from recipes.feed import fan_out
 from recipes.models import (Ingredient, Favorite, Recipe, RecipeIngredient,
                             ShoppingCart, Tag)
 from users.models import Follow, User
 
 
+def absolute_variants(request, variants):
+    if request is None:
+        return variants
+    return {
+        variant: {
+            key: request.build_absolute_uri(value)
+            if isinstance(value, str) else value
+            for key, value in formats.items()
+        }
+        for variant, formats in variants.items()
+    }
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    def to_representation(self, variants):
+        return absolute_variants(self.context.get('request'), variants)
+
+
 class UserSerializer(UserBaseSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar_variants = ImageVariantsField()
 
     class Meta(UserBaseSerializer.Meta):
         model = User
-        fields = UserBaseSerializer.Meta.fields + ('is_subscribed', 'avatar')
+        fields = UserBaseSerializer.Meta.fields + (
+            'is_subscribed', 'avatar', 'avatar_variants'
+        )
 
     def get_is_subscribed(self, obj):
-        request = self.context['request']
-        return (
-            request and request.user
-            and obj.subscriptions_to_author.filter(
-                user=request.user.id
-            ).exists()
+        return obj.pk in get_subscribed_author_ids(
+            self.context.get('request')
         )
 
 
@@ -41,6 +64,17 @@ class UserAvatarSerializer(UserBaseSerializer):
             )
         return avatar
 
+    def update(self, instance, validated_data):
+        instance.avatar = validated_data['avatar']
+        instance.save(update_fields=('avatar', 'updated_at'))
+        schedule_image_processing(
+            instance,
+            'avatar',
+            'avatar_variants',
+            user_namespaces(instance.pk)
+        )
+        return instance
+
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
@@ -55,9 +89,7 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class IngredientsAddSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-    )
+    id = serializers.IntegerField()
     amount = serializers.IntegerField(min_value=MIN_VALUE)
 
     class Meta:
@@ -100,6 +132,7 @@ class RecipeSerializer(serializers.ModelSerializer):
     amount = RecipeIngredientSerializer(many=True, read_only=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -111,6 +144,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             'amount',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
             'is_favorited',
@@ -118,6 +152,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         return (
             request and request.user
@@ -127,6 +163,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         return (
             request and request.user
@@ -141,9 +179,8 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         many=True,
         allow_empty=False
     )
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True,
+    tags = serializers.ListField(
+        child=serializers.IntegerField(),
         allow_empty=False
     )
     image = Base64ImageField(
@@ -166,20 +203,37 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('author',)
 
+    @staticmethod
+    def get_missing(model, ids):
+        found = model.objects.in_bulk(ids)
+        return found, [pk for pk in ids if pk not in found]
+
     def validate(self, data):
-        ingredients = data['ingredients']
-        tags = data['tags']
-        ingredient_ids = [
-            ingredient['id'] for ingredient in ingredients
-        ]
-        if len(set(ingredient_ids)) != len(ingredients):
-            raise serializers.ValidationError(
-                'Нельзя дублировать ингредиенты'
-            )
-        if len(set(tags)) != len(tags):
-            raise serializers.ValidationError(
-                'Нельзя дублировать теги'
-            )
+        if 'ingredients' in data:
+            ingredient_ids = [
+                ingredient['id'] for ingredient in data['ingredients']
+            ]
+            if len(set(ingredient_ids)) != len(ingredient_ids):
+                raise serializers.ValidationError(
+                    'Нельзя дублировать ингредиенты'
+                )
+            _, missing = self.get_missing(Ingredient, ingredient_ids)
+            if missing:
+                raise serializers.ValidationError({
+                    'ingredients': f'Ингредиенты не найдены: {missing}'
+                })
+        if 'tags' in data:
+            tag_ids = data['tags']
+            if len(set(tag_ids)) != len(tag_ids):
+                raise serializers.ValidationError(
+                    'Нельзя дублировать теги'
+                )
+            tags, missing = self.get_missing(Tag, tag_ids)
+            if missing:
+                raise serializers.ValidationError({
+                    'tags': f'Теги не найдены: {missing}'
+                })
+            data['tags'] = [tags[pk] for pk in tag_ids]
         return data
 
     @staticmethod
@@ -187,13 +241,46 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         data_list = [
             RecipeIngredient(
                 recipe=recipe,
-                ingredient_id=ingrdient['id'].id,
+                ingredient_id=ingrdient['id'],
                 amount=ingrdient['amount']
             )
             for ingrdient in ingredients
         ]
         RecipeIngredient.objects.bulk_create(data_list)
 
+    @staticmethod
+    def update_ingredients(ingredients, recipe):
+        current = {
+            row.ingredient_id: row
+            for row in RecipeIngredient.objects.filter(recipe=recipe)
+        }
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe,
+                ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, amount in amounts.items():
+            row = current.get(ingredient_id)
+            if row is not None and row.amount != amount:
+                row.amount = amount
+                changed.append(row)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        RecipeCreateSerializer.get_ingredients(
+            [
+                ingredient for ingredient in ingredients
+                if ingredient['id'] not in current
+            ],
+            recipe
+        )
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
@@ -201,23 +288,45 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(**validated_data, author=author)
         recipe.tags.set(tags)
         self.get_ingredients(ingredients, recipe)
+        change_counter(User.objects.filter(pk=author.pk), 'recipes_count')
+        fan_out(recipe)
+        schedule_image_processing(
+            recipe, 'image', 'image_variants', recipe_namespaces(recipe.pk)
+        )
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        ingredients = validated_data.pop('ingredients')
-        instance.recipeingredient_set.all().delete()
-        self.get_ingredients(ingredients, instance)
-        instance.tags.set(validated_data.pop('tags'))
-        return super().update(instance, validated_data)
+        if 'ingredients' in validated_data:
+            self.update_ingredients(
+                validated_data.pop('ingredients'), instance
+            )
+        if 'tags' in validated_data:
+            instance.tags.set(validated_data.pop('tags'))
+        image_changed = bool(validated_data.get('image'))
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=(*validated_data, 'updated_at'))
+        if image_changed:
+            schedule_image_processing(
+                instance,
+                'image',
+                'image_variants',
+                recipe_namespaces(instance.pk)
+            )
+        return instance
 
     def to_representation(self, instance):
         return RecipeSerializer(
-            instance=instance,
+            instance=Recipe.objects.for_read(
+                self.context['request'].user
+            ).get(pk=instance.pk),
             context=self.context
         ).data
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -225,6 +334,7 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time',
         )
 
@@ -265,8 +375,19 @@ class ShoppingCartSerializer(FavoriteShoppingCartSerializer):
         model = ShoppingCart
 
 
+class BulkRecipesSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=MIN_VALUE),
+        allow_empty=False,
+        max_length=BULK_RECIPES_LIMIT
+    )
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
+
+
 class UserFollowSerializer(UserSerializer):
-    recipes_count = serializers.IntegerField(default=0)
+    recipes_count = serializers.IntegerField(read_only=True)
     recipes = serializers.SerializerMethodField()
 
     class Meta(UserSerializer.Meta):
@@ -277,13 +398,12 @@ class UserFollowSerializer(UserSerializer):
         )
 
     def get_recipes(self, obj):
-        limit = self.context['request'].query_params.get('recipes_limit')
-        recipes = obj.recipes.all()
-        if limit:
-            try:
-                recipes = recipes[:int(limit)]
-            except ValueError:
-                limit = None
+        recipes = getattr(obj, 'latest_recipes', None)
+        if recipes is None:
+            recipes = obj.recipes.all()
+            limit = get_recipes_limit(self.context['request'])
+            if limit:
+                recipes = recipes[:limit]
         return ShortRecipeSerializer(
             recipes,
             many=True,
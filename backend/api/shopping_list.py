@@ -0,0 +1,151 @@
+import csv
+import hashlib
+import json
+from io import BytesIO
+
+from django.conf import settings
+from django.db.models import Count, F, Max, Sum
+from django.http import StreamingHttpResponse
+from django.utils.http import quote_etag
+from PIL import Image, ImageDraw, ImageFont
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .constants import (PDF_FONT_SIZE, PDF_LINE_HEIGHT, PDF_MARGIN,
+                        PDF_PAGE_SIZE, SHOPPING_LIST_FILENAME,
+                        SHOPPING_LIST_TITLE)
+from recipes.cache import get_version
+from recipes.constants import INGREDIENTS_NAMESPACE
+from recipes.models import RecipeIngredient, ShoppingCart
+
+
+class ExportUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Экспорт в этом формате временно недоступен.'
+    default_code = 'export_unavailable'
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def get_ingredients(user):
+    return RecipeIngredient.objects.filter(
+        recipe__shoppingcart_set__user=user
+    ).values(
+        name=F('ingredient__name'),
+        measurement=F('ingredient__measurement_unit'),
+    ).annotate(
+        amount=Sum('amount')
+    ).order_by('name')
+
+
+def get_etag(user, file_format):
+    cart = ShoppingCart.objects.filter(user=user).aggregate(
+        recipes=Count('recipe', distinct=True),
+        last_added=Max('id'),
+        rows=Count('recipe__recipeingredient_set'),
+        last_row=Max('recipe__recipeingredient_set__id'),
+        amount=Sum('recipe__recipeingredient_set__amount'),
+    )
+    catalog = get_version(INGREDIENTS_NAMESPACE)
+    state = f'{user.pk}:{file_format}:{catalog}:' + ':'.join(
+        str(cart[key]) for key in sorted(cart)
+    )
+    return quote_etag(hashlib.md5(state.encode()).hexdigest())
+
+
+def render_text(ingredients):
+    yield f'{SHOPPING_LIST_TITLE}\n\n'
+    for number, item in enumerate(ingredients, 1):
+        yield (f'{number}. {item["name"]} '
+               f'({item["measurement"]}) — {item["amount"]}\n')
+
+
+def render_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield '\ufeff'
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for item in ingredients:
+        yield writer.writerow(
+            (item['name'], item['measurement'], item['amount'])
+        )
+
+
+def render_json(ingredients):
+    yield '['
+    separator = ''
+    for item in ingredients:
+        yield separator + json.dumps(
+            {
+                'name': item['name'],
+                'measurement_unit': item['measurement'],
+                'amount': item['amount'],
+            },
+            ensure_ascii=False
+        )
+        separator = ','
+    yield ']'
+
+
+def get_pdf_font():
+    try:
+        return ImageFont.truetype(settings.SHOPPING_LIST_FONT, PDF_FONT_SIZE)
+    except OSError:
+        raise ExportUnavailable(
+            'Экспорт в PDF недоступен: не найден шрифт '
+            f'{settings.SHOPPING_LIST_FONT}.'
+        )
+
+
+def render_pdf(ingredients):
+    font = get_pdf_font()
+    lines = [SHOPPING_LIST_TITLE, ''] + [
+        f'{number}. {item["name"]} ({item["measurement"]}) '
+        f'— {item["amount"]}'
+        for number, item in enumerate(ingredients, 1)
+    ]
+    per_page = (PDF_PAGE_SIZE[1] - 2 * PDF_MARGIN) // PDF_LINE_HEIGHT
+    pages = []
+    for start in range(0, len(lines), per_page):
+        page = Image.new('L', PDF_PAGE_SIZE, color=255)
+        draw = ImageDraw.Draw(page)
+        for row, line in enumerate(lines[start:start + per_page]):
+            draw.text(
+                (PDF_MARGIN, PDF_MARGIN + row * PDF_LINE_HEIGHT),
+                line,
+                fill=0,
+                font=font
+            )
+        pages.append(page)
+    document = BytesIO()
+    pages[0].save(
+        document,
+        format='PDF',
+        save_all=True,
+        append_images=pages[1:],
+        resolution=96.0
+    )
+    return [document.getvalue()]
+
+
+EXPORT_FORMATS = {
+    'txt': ('text/plain; charset=utf-8', render_text),
+    'csv': ('text/csv; charset=utf-8', render_csv),
+    'json': ('application/json; charset=utf-8', render_json),
+    'pdf': ('application/pdf', render_pdf),
+}
+
+
+def export_shopping_list(user, file_format):
+    content_type, render = EXPORT_FORMATS[file_format]
+    ingredients = list(get_ingredients(user))
+    response = StreamingHttpResponse(
+        render(ingredients),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{SHOPPING_LIST_FILENAME}.{file_format}"'
+    )
+    return response
@@ -0,0 +1,531 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.test import (SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import (APIClient, APIRequestFactory,
+                                 force_authenticate)
+
+from .constants import BENCHMARK_IMAGE, SHOPPING_LIST_FORMAT_PARAM
+from .images import process_image
+from .renderers import FastJSONRenderer
+from .views import RecipeViewSet
+from foodgram.db_router import ReplicaRouter, health, reading_from
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from recipes.short_links import HitBuffer
+from users.models import Follow, User
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+PASSWORD = 'Foodgram-test-123'
+REPLICA = 'replica1'
+RECIPES_COUNT = 12
+RECIPE_LIST = {'get': 'list', 'post': 'create'}
+RECIPE_DETAIL = {
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+}
+FAVORITE = {'post': 'favorite', 'delete': 'delete_favorite'}
+SHOPPING_CART = {'post': 'shopping_cart', 'delete': 'delete_shopping_cart'}
+FAVORITE_BULK = {'delete': 'delete_favorite_bulk'}
+DOWNLOAD = {'get': 'download_shopping_cart'}
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        first_name=username,
+        last_name=username,
+        password=PASSWORD,
+    )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RecipeAPITestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        cls.addClassCleanup(media.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.reader = create_user('reader')
+        cls.tags = [
+            Tag.objects.create(name=f'Тег {number}', slug=f'tag{number}')
+            for number in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(20)
+        ]
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author,
+                name=f'Рецепт {number}',
+                text='Описание рецепта.',
+                image='recipes/images/test.png',
+                cooking_time=10 + number,
+            )
+            for number in range(RECIPES_COUNT)
+        ]
+        for number, recipe in enumerate(cls.recipes):
+            recipe.tags.set(cls.tags[:number % 3 + 1])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=number + 1
+                )
+                for ingredient in cls.ingredients[number:number + 3]
+            )
+        Favorite.objects.bulk_create(
+            Favorite(user=cls.reader, recipe=recipe)
+            for recipe in cls.recipes[::2]
+        )
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=cls.reader, recipe=recipe)
+            for recipe in cls.recipes[::3]
+        )
+
+    def call(self, actions, method, user=None, data=None, **kwargs):
+        path = '/api/recipes/'
+        if 'pk' in kwargs:
+            path = f'{path}{kwargs["pk"]}/'
+        request = getattr(APIRequestFactory(), method)(
+            path, data, format='json' if method != 'get' else None
+        )
+        if user is not None:
+            force_authenticate(request, user)
+        return RecipeViewSet.as_view(actions)(request, **kwargs)
+
+    def recipe_payload(self, name, ingredients):
+        return {
+            'name': name,
+            'text': 'Новое описание.',
+            'cooking_time': 5,
+            'image': BENCHMARK_IMAGE,
+            'tags': [tag.id for tag in self.tags[:2]],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 3}
+                for ingredient in ingredients
+            ],
+        }
+
+    def count_queries(self, *args, **kwargs):
+        with CaptureQueriesContext(connections['default']) as context:
+            response = self.call(*args, **kwargs)
+        self.assertLess(response.status_code, 400, response.data)
+        return len(context.captured_queries)
+
+
+class RecipeFlagsTests(RecipeAPITestCase):
+
+    def list_queries(self, user):
+        return [
+            self.count_queries(
+                RECIPE_LIST, 'get', user, {'limit': limit}
+            )
+            for limit in (1, 5, RECIPES_COUNT)
+        ]
+
+    def assert_constant_list(self, user, queries):
+        self.assertEqual(self.list_queries(user), [queries] * 3)
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        self.assert_constant_list(self.reader, 6)
+
+    def test_anonymous_list_queries_do_not_grow_with_page_size(self):
+        self.assert_constant_list(None, 5)
+
+    @override_settings(FAST_READ_SERIALIZERS=False)
+    def test_serializer_list_queries_do_not_grow_with_page_size(self):
+        self.assert_constant_list(self.reader, 5)
+
+    def test_flags_come_from_annotations(self):
+        response = self.call(
+            RECIPE_LIST, 'get', self.reader, {'limit': RECIPES_COUNT}
+        )
+        flags = {
+            recipe['id']: (
+                recipe['is_favorited'], recipe['is_in_shopping_cart']
+            )
+            for recipe in response.data['results']
+        }
+        self.assertEqual(flags, {
+            recipe.id: (number % 2 == 0, number % 3 == 0)
+            for number, recipe in enumerate(self.recipes)
+        })
+
+    def test_detail_queries(self):
+        with self.assertNumQueries(6):
+            self.call(
+                RECIPE_DETAIL, 'get', self.reader, pk=self.recipes[0].id
+            )
+
+
+class RecipeQueryPlanTests(RecipeAPITestCase):
+
+    def test_create_queries(self):
+        with self.assertNumQueries(16):
+            response = self.call(
+                RECIPE_LIST, 'post', self.author,
+                self.recipe_payload('Новый рецепт', self.ingredients[:3])
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['ingredients']), 3)
+
+    def test_update_queries(self):
+        with self.assertNumQueries(17):
+            response = self.call(
+                RECIPE_DETAIL, 'patch', self.author,
+                self.recipe_payload('Новый рецепт', self.ingredients[:3]),
+                pk=self.recipes[1].id
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [ingredient['id'] for ingredient in response.data['ingredients']],
+            [ingredient.id for ingredient in self.ingredients[:3]]
+        )
+
+    def assert_toggle_queries(self, actions, recipe):
+        with self.assertNumQueries(8):
+            response = self.call(actions, 'post', self.reader, pk=recipe.id)
+        self.assertEqual(response.status_code, 201)
+        with self.assertNumQueries(5):
+            response = self.call(
+                actions, 'delete', self.reader, pk=recipe.id
+            )
+        self.assertEqual(response.status_code, 204)
+
+    def test_favorite_queries(self):
+        self.assert_toggle_queries(FAVORITE, self.recipes[1])
+
+    def test_shopping_cart_queries(self):
+        self.assert_toggle_queries(SHOPPING_CART, self.recipes[1])
+
+
+class RecipeIngredientDiffTests(RecipeAPITestCase):
+
+    def capture(self, *args, **kwargs):
+        with CaptureQueriesContext(connections['default']) as context:
+            response = self.call(*args, **kwargs)
+        self.assertLess(response.status_code, 400, response.data)
+        return [query['sql'] for query in context.captured_queries]
+
+    def test_create_queries_do_not_grow_with_ingredients(self):
+        self.assertEqual(
+            len(self.capture(
+                RECIPE_LIST, 'post', self.author,
+                self.recipe_payload('Короткий', self.ingredients[:1])
+            )),
+            len(self.capture(
+                RECIPE_LIST, 'post', self.author,
+                self.recipe_payload('Длинный', self.ingredients)
+            ))
+        )
+
+    def test_update_queries_do_not_grow_with_ingredients(self):
+        self.assertEqual(
+            len(self.capture(
+                RECIPE_DETAIL, 'patch', self.author,
+                self.recipe_payload('Короткий', self.ingredients[15:16]),
+                pk=self.recipes[4].id
+            )),
+            len(self.capture(
+                RECIPE_DETAIL, 'patch', self.author,
+                self.recipe_payload('Длинный', self.ingredients[4:]),
+                pk=self.recipes[1].id
+            ))
+        )
+
+    def test_unchanged_ingredients_are_not_written(self):
+        recipe = self.recipes[2]
+        payload = self.recipe_payload(recipe.name, self.ingredients[2:5])
+        payload['ingredients'] = [
+            {'id': row.ingredient_id, 'amount': row.amount}
+            for row in recipe.recipeingredient_set.all()
+        ]
+        rows = set(recipe.recipeingredient_set.values_list('id', flat=True))
+        queries = self.capture(
+            RECIPE_DETAIL, 'patch', self.author, payload, pk=recipe.id
+        )
+        self.assertFalse([
+            sql for sql in queries
+            if 'recipes_recipeingredient' in sql
+            and not sql.startswith('SELECT')
+        ])
+        self.assertEqual(
+            set(recipe.recipeingredient_set.values_list('id', flat=True)),
+            rows
+        )
+
+    def test_text_update_keeps_ingredient_rows(self):
+        recipe = self.recipes[3]
+        queries = self.capture(
+            RECIPE_DETAIL, 'patch', self.author,
+            {'text': 'Только текст.'},
+            pk=recipe.id
+        )
+        self.assertFalse([
+            sql for sql in queries
+            if 'recipes_recipeingredient' in sql
+            and not sql.startswith('SELECT')
+        ])
+
+
+class RecipeCounterTests(RecipeAPITestCase):
+
+    def test_update_keeps_concurrent_counters(self):
+        recipe = self.recipes[5]
+        Recipe.objects.filter(pk=recipe.pk).update(
+            favorites_count=7, in_carts_count=3
+        )
+        with CaptureQueriesContext(connections['default']) as context:
+            response = self.call(
+                RECIPE_DETAIL, 'patch', self.author,
+                {'text': 'Только текст.'},
+                pk=recipe.id
+            )
+        self.assertEqual(response.status_code, 200)
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "recipes_recipe"')
+        ]
+        self.assertEqual(len(updates), 1)
+        for column in ('favorites_count', 'in_carts_count', 'image_variants'):
+            self.assertNotIn(column, updates[0])
+        recipe.refresh_from_db()
+        self.assertEqual(
+            (recipe.text, recipe.favorites_count, recipe.in_carts_count),
+            ('Только текст.', 7, 3)
+        )
+
+    def test_decrement_stops_at_zero(self):
+        favorited = self.recipes[::2]
+        self.assertFalse(
+            Recipe.objects.filter(favorites_count__gt=0).exists()
+        )
+        response = self.call(
+            FAVORITE, 'delete', self.reader, pk=favorited[0].id
+        )
+        self.assertEqual(response.status_code, 204)
+        response = self.call(
+            FAVORITE_BULK, 'delete', self.reader,
+            {'recipes': [recipe.id for recipe in favorited[1:]]}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(Recipe.objects.values_list('favorites_count', flat=True)),
+            {0}
+        )
+
+
+class FastSerializerContractTests(RecipeAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        variants = {
+            'small': {
+                'width': 64,
+                'height': 64,
+                'png': '/media/users/images/small.png',
+            },
+        }
+        User.objects.filter(pk=cls.author.pk).update(
+            avatar='users/images/avatar.png', avatar_variants=variants
+        )
+        Recipe.objects.filter(pk=cls.recipes[0].pk).update(
+            text='Строка\u2028с разделителем и "кавычками" — 100%',
+            image_variants=variants
+        )
+
+    def render(self, actions, user, fast, **kwargs):
+        cache.clear()
+        with self.settings(FAST_READ_SERIALIZERS=fast):
+            response = self.call(
+                actions, 'get', user, {'limit': RECIPES_COUNT}, **kwargs
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assert_same_bytes(self, actions, **kwargs):
+        for user in (None, self.reader, self.author):
+            with self.subTest(user=user):
+                expected = JSONRenderer().render(
+                    self.render(actions, user, fast=False, **kwargs)
+                )
+                data = self.render(actions, user, fast=True, **kwargs)
+                self.assertEqual(JSONRenderer().render(data), expected)
+                self.assertEqual(FastJSONRenderer().render(data), expected)
+
+    def test_list_matches_serializers(self):
+        self.assert_same_bytes(RECIPE_LIST)
+
+    def test_detail_matches_serializers(self):
+        self.assert_same_bytes(RECIPE_DETAIL, pk=self.recipes[0].id)
+
+
+class RecipeImageTests(RecipeAPITestCase):
+
+    def test_original_loses_exif(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = 'Camera'
+        exif[0x8825] = {1: 'N', 2: (55.0, 45.0, 0.0)}
+        buffer = BytesIO()
+        Image.new('RGB', (40, 20), 'red').save(buffer, 'JPEG', exif=exif)
+        name = default_storage.save(
+            'recipes/images/photo.jpg', ContentFile(buffer.getvalue())
+        )
+        recipe = self.recipes[0]
+        Recipe.objects.filter(pk=recipe.pk).update(image=name)
+        process_image(Recipe, recipe.pk, 'image', 'image_variants')
+        recipe.refresh_from_db()
+        self.assertTrue(recipe.image_variants)
+        with default_storage.open(recipe.image.name) as source:
+            with Image.open(source) as image:
+                self.assertEqual(image.size, (20, 40))
+                self.assertNotIn('exif', image.info)
+                self.assertFalse(image.getexif())
+
+
+class ShoppingListTests(RecipeAPITestCase):
+
+    def download(self, file_format):
+        response = self.call(
+            DOWNLOAD, 'get', self.reader,
+            {SHOPPING_LIST_FORMAT_PARAM: file_format}
+        )
+        if response.status_code == 200:
+            b''.join(response.streaming_content)
+        return response
+
+    @override_settings(SHOPPING_LIST_FONT='/nonexistent/font.ttf')
+    def test_pdf_without_font_is_unavailable(self):
+        self.assertEqual(self.download('pdf').status_code, 503)
+        self.assertEqual(self.download('txt').status_code, 200)
+
+    def test_etag_follows_ingredient_catalog(self):
+        etag = self.download('txt')['ETag']
+        self.assertEqual(self.download('txt')['ETag'], etag)
+        ingredient = self.recipes[0].ingredients.first()
+        ingredient.name = 'Переименованный ингредиент'
+        with self.captureOnCommitCallbacks(execute=True):
+            ingredient.save()
+        self.assertNotEqual(self.download('txt')['ETag'], etag)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, REPLICA_DATABASES=(REPLICA,))
+class ReplicaRoutingTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('reader')
+        self.author = create_user('author')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'replica.sqlite3')
+        replica = sqlite3.connect(path)
+        connections['default'].ensure_connection()
+        connections['default'].connection.backup(replica)
+        replica.close()
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': path,
+        }
+        self.addCleanup(self.remove_replica)
+        self.client = APIClient()
+
+    @staticmethod
+    def remove_replica():
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        health.checked.clear()
+
+    def authorize(self, key):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+
+    def test_reads_go_to_replica(self):
+        with reading_from(REPLICA):
+            self.assertEqual(ReplicaRouter().db_for_read(Recipe), REPLICA)
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections[REPLICA]) as replica:
+                response = self.client.get(f'/api/users/{self.author.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(replica.captured_queries)
+        self.assertEqual(primary.captured_queries, [])
+
+    def test_login_pins_new_token_to_primary(self):
+        response = self.client.post(
+            '/api/auth/token/login/',
+            {'email': self.user.email, 'password': PASSWORD},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.authorize(response.data['auth_token'])
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], self.user.id)
+
+    def test_write_pins_client_to_primary(self):
+        self.authorize(Token.objects.create(user=self.user).key)
+        response = self.client.post(
+            f'/api/users/{self.author.id}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 201)
+        response = self.client.get('/api/users/subscriptions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [author['id'] for author in response.data['results']],
+            [self.author.id]
+        )
+
+
+class HitBufferTests(SimpleTestCase):
+
+    def test_hits_are_flushed_by_background_thread(self):
+        written = []
+        flushed = threading.Event()
+
+        def write(hits):
+            if hits:
+                written.append((threading.current_thread(), hits))
+                flushed.set()
+
+        buffer = HitBuffer(flush_size=100, flush_interval=0.2)
+        buffer.write = write
+        buffer.add(1)
+        buffer.add(1)
+        self.assertEqual(written, [])
+        self.assertTrue(flushed.wait(5))
+        thread, hits = written[0]
+        self.assertIsNot(thread, threading.current_thread())
+        self.assertEqual(hits, {1: 2})
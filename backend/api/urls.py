@@ -1,7 +1,10 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from .async_views import (ingredient_list, recipe_detail, recipe_list,
+                          tag_list)
+from .views import (IngredientViewSet, RecipeViewSet, TagViewSet,
+                    UserViewSet, metrics)
 
 router = DefaultRouter()
 router.register(r'recipes', RecipeViewSet, basename='recipe')
@@ -12,5 +15,10 @@ router.register(r'users', UserViewSet, basename='user')
 
 urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
+    path('metrics/', metrics, name='metrics'),
+    path('tags/', tag_list),
+    path('ingredients/', ingredient_list),
+    path('recipes/', recipe_list),
+    path('recipes/<int:pk>/', recipe_detail),
     path('', include(router.urls))
 ]
@@ -1,27 +1,46 @@
-import short_url
-from django.db.models import Count, Exists, F, Sum, OuterRef
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import HttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from django.http import FileResponse
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from rest_framework import status, viewsets
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 
+from .catalogs import catalog_response, get_catalog
+from .conditional import (ConditionalRetrieveMixin, conditional_response,
+                          get_user_validators)
+from .constants import (METRICS_CONTENT_TYPE, SHOPPING_LIST_DEFAULT_FORMAT,
+                        SHOPPING_LIST_FORMAT_PARAM)
+from .fast_serializers import FastRecipeReadMixin
 from .filters import IngredientFilter, RecipeFilter
-from .pagination import PageLimitPagination
-from .permissions import IsAuthorOrReadOnly
-from .serializers import (FollowSerializer,
+from .images import variant_paths
+from .ingredient_search import ingredient_index
+from .loaders import attach_latest_recipes, get_recipes_limit
+from .metrics import registry
+from .pagination import (CursorPaginationMixin, FeedCursorPagination,
+                         PageLimitPagination, RecipeCursorPagination,
+                         UserCursorPagination)
+from .permissions import IsAdminOrMetricsToken, IsAuthorOrReadOnly
+from .response_cache import AnonymousCacheMixin
+from .serializers import (BulkRecipesSerializer, FollowSerializer,
                           IngredientSerializer, RecipeCreateSerializer,
                           RecipeSerializer,
                           TagSerializer, UserAvatarSerializer,
                           UserFollowSerializer, UserSerializer,
                           FavoriteSerializer, ShoppingCartSerializer)
-from recipes.models import (Favorite, Ingredient,
-                            Recipe, RecipeIngredient,
+from .shopping_list import EXPORT_FORMATS, export_shopping_list, get_etag
+from recipes.constants import INGREDIENTS_NAMESPACE, TAGS_NAMESPACE
+from recipes.counters import change_counter
+from recipes.feed import backfill, prune
+from recipes.short_links import get_or_create_link
+from recipes.models import (FeedEntry, Favorite, Ingredient, Recipe,
                             ShoppingCart, Tag)
 from users.models import Follow, User
 
@@ -31,6 +50,12 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TagSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return catalog_response(
+            request,
+            get_catalog(TAGS_NAMESPACE, self.get_queryset(), TagSerializer)
+        )
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
@@ -40,39 +65,46 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ('name',)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(name))
+        return catalog_response(
+            request,
+            get_catalog(
+                INGREDIENTS_NAMESPACE,
+                self.get_queryset(),
+                IngredientSerializer
+            )
+        )
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(AnonymousCacheMixin, ConditionalRetrieveMixin,
+                    FastRecipeReadMixin, CursorPaginationMixin,
+                    viewsets.ModelViewSet):
     permission_classes = (IsAuthorOrReadOnly,)
     pagination_class = PageLimitPagination
+    cursor_pagination_class = RecipeCursorPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
     def get_queryset(self):
-        queryset = Recipe.objects.select_related(
-            'author'
-        ).prefetch_related(
-            'tags',
-            'ingredients',
-        )
-        user = self.request.user
-        if user.is_authenticated:
-            is_favorited = user.favorite_set.filter(
-                recipe=OuterRef('pk')
-            )
-            is_in_shopping_cart = user.shoppingcart_set.filter(
-                recipe=OuterRef('pk')
-            )
-            queryset.annotate(
-                is_favorited=Exists(is_favorited),
-                is_in_shopping_cart=Exists(is_in_shopping_cart)
-            )
-        return queryset
+        return Recipe.objects.for_read(self.request.user)
 
     def get_serializer_class(self):
         if self.action in ('create', 'update', 'partial_update'):
             return RecipeCreateSerializer
         return RecipeSerializer
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        change_counter(
+            User.objects.filter(pk=instance.author_id),
+            'recipes_count',
+            -1
+        )
+
     @staticmethod
     def get_favorite_or_cart(request, serializer_class, pk):
         serializer = serializer_class(
@@ -82,18 +114,32 @@ class RecipeViewSet(viewsets.ModelViewSet):
             }
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        model = serializer_class.Meta.model
+        with transaction.atomic():
+            instance = serializer.save()
+            change_counter(
+                Recipe.objects.filter(pk=instance.recipe_id),
+                model.counter_field
+            )
         return Response(
             serializer.data,
             status=status.HTTP_201_CREATED
         )
 
     @staticmethod
+    @transaction.atomic
     def del_favorite_or_cart(request, model, pk):
+        recipe = get_object_or_404(Recipe, pk=pk)
         delete_status, _ = model.objects.filter(
             user=request.user,
-            recipe=get_object_or_404(Recipe, pk=pk).pk
+            recipe=recipe.pk
         ).delete()
+        if delete_status:
+            change_counter(
+                Recipe.objects.filter(pk=recipe.pk),
+                model.counter_field,
+                -1
+            )
         return Response(
             'Рецепт удален',
             status=status.HTTP_204_NO_CONTENT
@@ -101,6 +147,77 @@ class RecipeViewSet(viewsets.ModelViewSet):
             else status.HTTP_400_BAD_REQUEST
         )
 
+    @staticmethod
+    def get_bulk_recipe_ids(request):
+        serializer = BulkRecipesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['recipes']
+
+    @classmethod
+    @transaction.atomic
+    def bulk_add(cls, request, model):
+        recipe_ids = cls.get_bulk_recipe_ids(request)
+        found = set(
+            Recipe.objects.filter(
+                pk__in=recipe_ids
+            ).values_list('pk', flat=True)
+        )
+        existing = set(
+            model.objects.filter(
+                user=request.user,
+                recipe_id__in=found
+            ).values_list('recipe_id', flat=True)
+        )
+        added = [pk for pk in recipe_ids if pk in found - existing]
+        model.objects.bulk_create(
+            [model(user=request.user, recipe_id=pk) for pk in added],
+            ignore_conflicts=True
+        )
+        change_counter(
+            Recipe.objects.filter(pk__in=added),
+            model.counter_field
+        )
+        return Response(
+            [
+                {
+                    'id': pk,
+                    'status': (
+                        'not_found' if pk not in found
+                        else 'exists' if pk in existing
+                        else 'added'
+                    ),
+                }
+                for pk in recipe_ids
+            ],
+            status=status.HTTP_200_OK
+        )
+
+    @classmethod
+    @transaction.atomic
+    def bulk_remove(cls, request, model):
+        recipe_ids = cls.get_bulk_recipe_ids(request)
+        links = model.objects.filter(
+            user=request.user,
+            recipe_id__in=recipe_ids
+        )
+        removed = set(links.values_list('recipe_id', flat=True))
+        links.delete()
+        change_counter(
+            Recipe.objects.filter(pk__in=removed),
+            model.counter_field,
+            -1
+        )
+        return Response(
+            [
+                {
+                    'id': pk,
+                    'status': 'removed' if pk in removed else 'absent',
+                }
+                for pk in recipe_ids
+            ],
+            status=status.HTTP_200_OK
+        )
+
     @action(
         detail=True,
         methods=('post',),
@@ -125,14 +242,31 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def delete_shopping_cart(self, request, pk=None):
         return self.del_favorite_or_cart(request, ShoppingCart, pk)
 
-    @staticmethod
-    def shopping_list(ingredients):
-        shopping_list = []
-        for item in ingredients:
-            shopping_list.append(f'\n{item["name"]}'
-                                 f', {item["amount"]}'
-                                 f', {item["measurement"]}')
-        return shopping_list
+    @action(
+        detail=False,
+        methods=('post',),
+        permission_classes=(IsAuthenticated,),
+        url_path='favorite/bulk'
+    )
+    def favorite_bulk(self, request):
+        return self.bulk_add(request, Favorite)
+
+    @favorite_bulk.mapping.delete
+    def delete_favorite_bulk(self, request):
+        return self.bulk_remove(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=('post',),
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart/bulk'
+    )
+    def shopping_cart_bulk(self, request):
+        return self.bulk_add(request, ShoppingCart)
+
+    @shopping_cart_bulk.mapping.delete
+    def delete_shopping_cart_bulk(self, request):
+        return self.bulk_remove(request, ShoppingCart)
 
     @action(
         methods=('get',),
@@ -140,19 +274,51 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__shoppingcart_set__user=user
-        ).values(
-            name=F('ingredient__name'),
-            measurement=F('ingredient__measurement_unit'),
-        ).annotate(
-            amount=Sum('amount')
-        ).order_by('name')
-        return FileResponse(
-            self.shopping_list(ingredients,),
-            content_type="text"
+        file_format = request.query_params.get(
+            SHOPPING_LIST_FORMAT_PARAM,
+            SHOPPING_LIST_DEFAULT_FORMAT
         )
+        if file_format not in EXPORT_FORMATS:
+            raise ValidationError({
+                SHOPPING_LIST_FORMAT_PARAM: (
+                    'Доступные форматы: '
+                    f'{", ".join(EXPORT_FORMATS)}.'
+                )
+            })
+        etag = get_etag(request.user, file_format)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = export_shopping_list(request.user, file_format)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @action(
+        methods=('get',),
+        detail=False,
+        permission_classes=(IsAuthenticated,)
+    )
+    def feed(self, request):
+        paginator = FeedCursorPagination()
+        entries = paginator.paginate_queryset(
+            FeedEntry.objects.filter(
+                user=request.user
+            ).only('recipe', 'pub_date'),
+            request,
+            view=self
+        )
+        recipes = Recipe.objects.for_read(request.user).in_bulk(
+            [entry.recipe_id for entry in entries]
+        )
+        serializer = RecipeSerializer(
+            [
+                recipes[entry.recipe_id] for entry in entries
+                if entry.recipe_id in recipes
+            ],
+            many=True,
+            context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
 
     @action(
         methods=('get',),
@@ -161,11 +327,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def get_link(self, request, pk):
         recipe = self.get_object()
-        short_link = short_url.encode_url(recipe.id)
         short_link = request.build_absolute_uri(
             reverse(
                 'shortlink',
-                kwargs={'slug': short_link}
+                kwargs={'slug': get_or_create_link(recipe).slug}
             )
         )
         return Response(
@@ -174,10 +339,11 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
 
-class UserViewSet(UserViewSet):
+class UserViewSet(CursorPaginationMixin, UserViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     pagination_class = PageLimitPagination
+    cursor_pagination_class = UserCursorPagination
     permission_classes = (IsAuthenticatedOrReadOnly,)
 
     @action(
@@ -186,13 +352,16 @@ class UserViewSet(UserViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def get_users_info(self, request):
-        serializer = UserSerializer(
-            request.user,
-            context={'request': request}
-        )
-        return Response(
-            serializer.data,
-            status=status.HTTP_200_OK
+        return conditional_response(
+            request,
+            get_user_validators(request),
+            lambda: Response(
+                UserSerializer(
+                    request.user,
+                    context={'request': request}
+                ).data,
+                status=status.HTTP_200_OK
+            )
         )
 
     @action(
@@ -216,7 +385,12 @@ class UserViewSet(UserViewSet):
 
     @avatar.mapping.delete
     def del_avatar(self, request):
-        request.user.avatar.delete()
+        user = request.user
+        for path in variant_paths(user.avatar_variants):
+            default_storage.delete(path)
+        user.avatar_variants = {}
+        user.avatar.delete(save=False)
+        user.save(update_fields=('avatar', 'avatar_variants', 'updated_at'))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -226,12 +400,14 @@ class UserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         user = request.user
+        recipes_limit = get_recipes_limit(request)
         queryset = User.objects.filter(
             subscriptions_to_author__user=user
-        ).annotate(
-            recipes_count=Count('recipes')
         ).order_by('username')
-        pages = self.paginate_queryset(queryset)
+        pages = attach_latest_recipes(
+            self.paginate_queryset(queryset),
+            recipes_limit
+        )
         serializer = UserFollowSerializer(
             pages,
             many=True,
@@ -253,20 +429,41 @@ class UserViewSet(UserViewSet):
             context={'request': request}
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            instance = serializer.save()
+            change_counter(
+                User.objects.filter(pk=instance.author_id),
+                'followers_count'
+            )
+            backfill(instance.user_id, instance.author_id)
         return Response(
             serializer.data,
             status=status.HTTP_201_CREATED
         )
 
     @subscribe.mapping.delete
+    @transaction.atomic
     def del_subscribe(self, request, id):
+        author = get_object_or_404(User, pk=id)
         delete_status, _ = Follow.objects.filter(
             user=request.user,
-            author=get_object_or_404(User, pk=id).id
+            author=author.id
         ).delete()
+        if delete_status:
+            change_counter(
+                User.objects.filter(pk=author.id),
+                'followers_count',
+                -1
+            )
+            prune(request.user.id, author.id)
         return Response(
             status=status.HTTP_204_NO_CONTENT
             if delete_status
             else status.HTTP_400_BAD_REQUEST
         )
+
+
+@api_view(('GET',))
+@permission_classes((IsAdminOrMetricsToken,))
+def metrics(request):
+    return HttpResponse(registry.render(), content_type=METRICS_CONTENT_TYPE)
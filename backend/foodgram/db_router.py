@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_CACHE_KEY = 'foodgram:primary-pin:{}'
+
+read_alias = ContextVar('read_alias', default=None)
+
+
+class ReplicaHealth:
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.checked = {}
+
+    def is_available(self, alias):
+        available, checked_at = self.checked.get(alias, (False, None))
+        if checked_at is not None and (
+            time.monotonic() - checked_at < self.interval
+        ):
+            return available
+        try:
+            connections[alias].ensure_connection()
+            available = True
+        except DatabaseError:
+            logger.warning('Реплика %s недоступна', alias, exc_info=True)
+            available = False
+        self.checked[alias] = (available, time.monotonic())
+        return available
+
+
+health = ReplicaHealth(settings.REPLICA_HEALTH_SECONDS)
+
+
+def choose_replica():
+    replicas = list(settings.REPLICA_DATABASES)
+    random.shuffle(replicas)
+    for alias in replicas:
+        if health.is_available(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+def get_client(request):
+    return (
+        request.META.get('HTTP_AUTHORIZATION')
+        or request.META.get('REMOTE_ADDR', '')
+    )
+
+
+def get_pin_key(client):
+    return PIN_CACHE_KEY.format(hashlib.sha256(client.encode()).hexdigest())
+
+
+def pin_client(client):
+    if settings.REPLICA_DATABASES:
+        cache.set(
+            get_pin_key(client), True, settings.REPLICA_STICKY_SECONDS
+        )
+
+
+def select_read_alias(request):
+    if (
+        not settings.REPLICA_DATABASES
+        or request.method not in SAFE_METHODS
+        or cache.get(get_pin_key(get_client(request)))
+    ):
+        return DEFAULT_DB_ALIAS
+    return choose_replica()
+
+
+def pin_to_primary(request, response):
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        pin_client(get_client(request))
+
+
+@contextmanager
+def reading_from(alias):
+    token = read_alias.set(alias)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
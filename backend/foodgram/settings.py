@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -32,6 +33,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryMetricsMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,6 +75,14 @@ if os.getenv('POSTGRES_DB'):
             'PORT': os.getenv('DB_PORT', 5432)
         }
     }
+    for number, host in enumerate(
+        os.getenv('DB_REPLICA_HOSTS', '').split(), start=1
+    ):
+        DATABASES[f'replica{number}'] = {
+            **DATABASES['default'],
+            'HOST': host,
+            'TEST': {'MIRROR': 'default'},
+        }
 else:
     DATABASES = {
         'default': {
@@ -79,6 +90,22 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    for number, name in enumerate(
+        os.getenv('SQLITE_REPLICAS', '').split(), start=1
+    ):
+        DATABASES[f'replica{number}'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / name,
+            'TEST': {'MIRROR': 'default'},
+        }
+
+REPLICA_DATABASES = tuple(alias for alias in DATABASES if alias != 'default')
+
+DATABASE_ROUTERS = ['foodgram.db_router.ReplicaRouter']
+
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+
+REPLICA_HEALTH_SECONDS = int(os.getenv('REPLICA_HEALTH_SECONDS', 10))
 
 
 AUTH_USER_MODEL = 'users.User'
@@ -128,12 +155,25 @@ DJOSER = {
     }
 }
 
+FAST_READ_SERIALIZERS = os.getenv('FAST_READ_SERIALIZERS', 'True') == 'True'
+
+FAST_JSON_RENDERER = os.getenv('FAST_JSON_RENDERER', 'True') == 'True'
+
+BROWSABLE_API = os.getenv('BROWSABLE_API', DEBUG) == 'True'
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        *(
+            ['rest_framework.renderers.BrowsableAPIRenderer']
+            if BROWSABLE_API else []
+        ),
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
@@ -142,6 +182,31 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 6,
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'foodgram-cache')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+        },
+    }
+}
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+
+SHOPPING_LIST_FONT = os.getenv(
+    'SHOPPING_LIST_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+
 BAD_USERNAMES = (
     'me',
 )
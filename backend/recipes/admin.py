@@ -3,7 +3,7 @@ from django.utils.safestring import mark_safe
 
 from .models import (Ingredient, Favorite,
                      Recipe, Tag, RecipeIngredient,
-                     ShoppingCart)
+                     ShoppingCart, ShortLink)
 
 
 class RecipeInline(admin.TabularInline):
@@ -25,7 +25,8 @@ class RecipeAdmin(admin.ModelAdmin):
         'cooking_time',
         'get_tags',
         'get_ingredients',
-        'favorite_amount'
+        'favorite_amount',
+        'in_carts_count',
     )
     list_display_links = (
         'name',
@@ -68,7 +69,7 @@ class RecipeAdmin(admin.ModelAdmin):
         description='Добавлений в избранное'
     )
     def favorite_amount(self, recipe):
-        return recipe.favorite_set.count()
+        return recipe.favorites_count
 
 
 @admin.register(Tag)
@@ -106,4 +107,11 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     empty_value_display = 'Нет Информации'
 
 
+@admin.register(ShortLink)
+class ShortLinkAdmin(admin.ModelAdmin):
+    list_display = ('slug', 'recipe', 'hits')
+    search_fields = ('slug',)
+    empty_value_display = 'Нет Информации'
+
+
 admin.site.empty_value_display = 'Не задано'
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from .constants import (CACHE_VERSION_KEY, RECIPE_NAMESPACE,
+                        RECIPES_NAMESPACE, USER_NAMESPACE, USERS_NAMESPACE)
+
+
+def new_version():
+    return time.time_ns()
+
+
+def get_version(namespace):
+    return cache.get_or_set(
+        CACHE_VERSION_KEY.format(namespace),
+        new_version,
+        timeout=None
+    )
+
+
+def get_versions(*namespaces):
+    keys = [CACHE_VERSION_KEY.format(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return tuple(versions[key] for key in keys)
+
+
+def recipe_namespaces(recipe_id):
+    return RECIPES_NAMESPACE, RECIPE_NAMESPACE.format(recipe_id)
+
+
+def user_namespaces(user_id):
+    return USERS_NAMESPACE, USER_NAMESPACE.format(user_id)
+
+
+def bump_version(*namespaces):
+    for namespace in namespaces:
+        key = CACHE_VERSION_KEY.format(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, new_version(), timeout=None)
+
+
+class LocalCache:
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
@@ -0,0 +1,196 @@
+import csv
+import json
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from .constants import CATALOG_CHUNK_SIZE, CATALOG_JSON_BUFFER_SIZE
+from .models import Ingredient, Tag
+
+
+CATALOGS = {
+    Ingredient: ('ingredients', 'name', ('name', 'measurement_unit')),
+    Tag: ('tags', 'slug', ('name', 'slug')),
+}
+
+
+def iter_json_array(file, buffer_size=CATALOG_JSON_BUFFER_SIZE):
+    decoder = json.JSONDecoder()
+    buffer = file.read(buffer_size).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('Ожидается JSON-массив объектов.')
+    buffer = buffer[1:]
+    finished = False
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if finished:
+                raise
+            chunk = file.read(buffer_size)
+            finished = not chunk
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def read_csv(file, fields):
+    for row in csv.reader(file):
+        if len(row) != len(fields):
+            yield ValueError(
+                f'ожидается колонок: {len(fields)}, получено: {len(row)}'
+            )
+        else:
+            yield dict(zip(fields, row))
+
+
+def read_json(file, fields):
+    for item in iter_json_array(file):
+        if not isinstance(item, dict) or set(fields) - set(item):
+            yield ValueError(f'ожидается объект с полями {", ".join(fields)}')
+        else:
+            yield {field: item[field] for field in fields}
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+}
+
+
+class CatalogLoader:
+
+    def __init__(self, model, file_format, chunk_size=CATALOG_CHUNK_SIZE,
+                 log=None, error=None):
+        self.model = model
+        self.file_format = file_format
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.error = error or (lambda message: None)
+        self.file_name, self.key, self.fields = CATALOGS[model]
+        self.update_fields = tuple(
+            field for field in self.fields if field != self.key
+        )
+        self.stats = dict(read=0, created=0, updated=0, errors=0)
+
+    def validated_rows(self, file):
+        seen = set()
+        for line, row in enumerate(
+            READERS[self.file_format](file, self.fields), 1
+        ):
+            self.stats['read'] += 1
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                row = {
+                    field: str(value).strip() for field, value in row.items()
+                }
+                self.model(**row).clean_fields()
+                if row[self.key] in seen:
+                    raise ValueError(f'повтор значения {row[self.key]!r}')
+            except (ValidationError, ValueError) as error:
+                self.stats['errors'] += 1
+                messages = getattr(error, 'message_dict', None) or str(error)
+                self.error(f'{self.file_name}:{line}: {messages}')
+                continue
+            seen.add(row[self.key])
+            yield row
+
+    def chunks(self, file):
+        chunk = []
+        for row in self.validated_rows(file):
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def load(self, path):
+        with open(path, encoding='utf-8', newline='') as file:
+            with transaction.atomic():
+                if connection.vendor == 'postgresql':
+                    self.load_with_copy(file)
+                else:
+                    self.load_with_diff(file)
+        return self.stats
+
+    def load_with_diff(self, file):
+        existing = {
+            getattr(obj, self.key): obj
+            for obj in self.model.objects.only('pk', *self.fields)
+        }
+        for chunk in self.chunks(file):
+            created = []
+            updated = []
+            for row in chunk:
+                obj = existing.get(row[self.key])
+                if obj is None:
+                    created.append(self.model(**row))
+                elif any(
+                    getattr(obj, field) != row[field]
+                    for field in self.update_fields
+                ):
+                    for field in self.update_fields:
+                        setattr(obj, field, row[field])
+                    updated.append(obj)
+            self.model.objects.bulk_create(created)
+            if updated and self.update_fields:
+                self.model.objects.bulk_update(updated, self.update_fields)
+            self.stats['created'] += len(created)
+            self.stats['updated'] += len(updated)
+            self.log(self.progress())
+
+    def load_with_copy(self, file):
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        columns = ', '.join(quote(field) for field in self.fields)
+        staging = quote(f'{self.model._meta.db_table}_staging')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS '
+                f'SELECT {columns} FROM {table} WITH NO DATA'
+            )
+            for chunk in self.chunks(file):
+                buffer = StringIO()
+                csv.writer(buffer).writerows(
+                    [row[field] for field in self.fields] for row in chunk
+                )
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f'COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)',
+                    buffer
+                )
+                self.log(self.progress())
+            update = ', '.join(
+                f'{quote(field)} = EXCLUDED.{quote(field)}'
+                for field in self.update_fields
+            )
+            changed = ' OR '.join(
+                f'{table}.{quote(field)} IS DISTINCT FROM '
+                f'EXCLUDED.{quote(field)}'
+                for field in self.update_fields
+            )
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) '
+                f'SELECT {columns} FROM {staging} '
+                f'ON CONFLICT ({quote(self.key)}) DO UPDATE SET {update} '
+                f'WHERE {changed} '
+                'RETURNING (xmax = 0)'
+            )
+            for (created,) in cursor.fetchall():
+                self.stats['created' if created else 'updated'] += 1
+
+    def progress(self):
+        return (
+            f'{self.model._meta.verbose_name_plural}: '
+            f'прочитано {self.stats["read"]}, '
+            f'добавлено {self.stats["created"]}, '
+            f'обновлено {self.stats["updated"]}, '
+            f'ошибок {self.stats["errors"]}'
+        )
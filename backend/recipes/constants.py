@@ -7,3 +7,25 @@ MIN_INGREDIENT_AMOUNT = 1
 MIN_VALUE = 1
 MAX_VALUE = 32767
 SLICE_LENGTH = 20
+INGREDIENTS_NAMESPACE = 'ingredients'
+TAGS_NAMESPACE = 'tags'
+CACHE_VERSION_KEY = 'foodgram:version:{}'
+GENERATOR_CHUNK_SIZE = 10000
+GENERATOR_ZIPF_EXPONENT = 1.1
+GENERATOR_PERIOD_DAYS = 730
+GENERATOR_PERMUTATION_STEPS = (7919, 104729, 1299709, 1000003)
+CATALOG_CHUNK_SIZE = 1000
+CATALOG_JSON_BUFFER_SIZE = 64 * 1024
+SEARCH_CONFIG = 'russian'
+SEARCH_VECTOR_COLUMN = 'search_vector'
+SEARCH_FTS_SUFFIX = '_fts'
+SEARCH_FTS_WEIGHTS = (10.0, 1.0)
+RECIPES_NAMESPACE = 'recipes'
+RECIPE_NAMESPACE = 'recipe:{}'
+USERS_NAMESPACE = 'users'
+USER_NAMESPACE = 'user:{}'
+SHORT_LINK_LEN = 32
+SHORT_LINK_CACHE_SIZE = 10000
+SHORT_LINK_CACHE_TTL = 60 * 5
+SHORT_LINK_FLUSH_SIZE = 100
+SHORT_LINK_FLUSH_INTERVAL = 30
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.dispatch import Signal
+
+from users.models import Follow
+from .models import Favorite, Recipe, ShoppingCart
+
+
+User = get_user_model()
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'in_carts_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+
+counter_changed = Signal()
+
+
+def change_counter(queryset, field, delta=1):
+    value = F(field) + delta
+    if delta < 0:
+        value = Greatest(value, 0)
+    updated = queryset.update(**{field: value})
+    if updated:
+        counter_changed.send(
+            sender=queryset.model, queryset=queryset, field=field
+        )
+    return updated
+
+
+def get_actual_count(related_model, related_field):
+    return Coalesce(
+        Subquery(
+            related_model.objects.filter(
+                **{related_field: OuterRef('pk')}
+            ).order_by().values(
+                related_field
+            ).annotate(
+                total=Count('pk')
+            ).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def recount_counters():
+    repaired = {}
+    for model, field, related_model, related_field in COUNTERS:
+        actual = get_actual_count(related_model, related_field)
+        drifted = model.objects.annotate(
+            actual=actual
+        ).exclude(
+            **{field: F('actual')}
+        ).values('pk')
+        repaired[f'{model.__name__}.{field}'] = model.objects.filter(
+            pk__in=Subquery(drifted)
+        ).update(**{field: actual})
+    return repaired
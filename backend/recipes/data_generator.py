@@ -0,0 +1,250 @@
+import csv
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+from itertools import accumulate, islice
+from math import gcd
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from users.models import Follow
+from .constants import (GENERATOR_CHUNK_SIZE, GENERATOR_PERIOD_DAYS,
+                        GENERATOR_PERMUTATION_STEPS, GENERATOR_ZIPF_EXPONENT)
+from .counters import recount_counters
+from .feed import rebuild_feed
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, Tag)
+
+
+User = get_user_model()
+
+
+class ZipfSampler:
+
+    def __init__(self, rng, ids, exponent=GENERATOR_ZIPF_EXPONENT):
+        self.rng = rng
+        self.ids = ids
+        self.cum_weights = list(accumulate(
+            1 / rank ** exponent for rank in range(1, len(ids) + 1)
+        ))
+        self.step = next(
+            step for step in GENERATOR_PERMUTATION_STEPS
+            if gcd(step, len(ids)) == 1
+        )
+
+    def sample(self, count):
+        size = len(self.ids)
+        return [
+            self.ids[rank * self.step % size]
+            for rank in self.rng.choices(
+                range(size), cum_weights=self.cum_weights, k=count
+            )
+        ]
+
+    def sample_distinct(self, count, exclude=None):
+        count = min(count, len(self.ids) // 2)
+        result = set()
+        for _ in range(10):
+            if len(result) >= count:
+                break
+            result.update(self.sample(count - len(result)))
+            result.discard(exclude)
+        return result
+
+
+@contextmanager
+def explicit_timestamps(model):
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class DataGenerator:
+
+    def __init__(self, rng, chunk_size=GENERATOR_CHUNK_SIZE, log=None,
+                 password=None, use_copy=None):
+        self.rng = rng
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.password = make_password(password) if password else '!'
+        self.use_copy = (
+            connection.vendor == 'postgresql' if use_copy is None
+            else use_copy
+        )
+        self.now = timezone.now()
+
+    def copy(self, model, objects):
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not (field.primary_key
+                    and getattr(objects[0], field.attname) is None)
+        ]
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        for obj in objects:
+            row = []
+            for field in fields:
+                value = getattr(obj, field.attname)
+                if value is None and (
+                    getattr(field, 'auto_now', False)
+                    or getattr(field, 'auto_now_add', False)
+                ):
+                    value = field.pre_save(obj, add=True)
+                value = field.get_db_prep_save(value, connection)
+                row.append('\\N' if value is None else value)
+            writer.writerow(row)
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {quote(model._meta.db_table)} '
+                f'({", ".join(quote(field.column) for field in fields)}) '
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer
+            )
+
+    def write(self, model, objects):
+        total = 0
+        for chunk in chunked(objects, self.chunk_size):
+            with transaction.atomic():
+                if self.use_copy:
+                    self.copy(model, chunk)
+                else:
+                    with explicit_timestamps(model):
+                        model.objects.bulk_create(chunk)
+            total += len(chunk)
+            self.log(f'{model._meta.verbose_name_plural}: {total}')
+        return total
+
+    @staticmethod
+    def next_ids(model, count):
+        start = (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        return range(start, start + count)
+
+    def timestamp(self):
+        return self.now - timedelta(
+            seconds=self.rng.uniform(0, GENERATOR_PERIOD_DAYS * 86400)
+        )
+
+    def amount(self, mean):
+        return int(self.rng.expovariate(1 / mean)) if mean else 0
+
+    def generate_users(self, count):
+        user_ids = self.next_ids(User, count)
+        self.write(User, (
+            User(
+                id=user_id,
+                username=f'user{user_id}',
+                email=f'user{user_id}@example.com',
+                first_name='Пользователь',
+                last_name=str(user_id),
+                password=self.password,
+                date_joined=self.timestamp(),
+                updated_at=self.now,
+            )
+            for user_id in user_ids
+        ))
+        return user_ids
+
+    def generate_recipes(self, count, authors, ingredients_per_recipe):
+        recipe_ids = self.next_ids(Recipe, count)
+        ingredients = ZipfSampler(
+            self.rng, list(Ingredient.objects.values_list('id', flat=True))
+        )
+        tags = list(Tag.objects.values_list('id', flat=True))
+        self.write(Recipe, (
+            Recipe(
+                id=recipe_id,
+                name=f'Рецепт {recipe_id}',
+                text=f'Описание рецепта {recipe_id}.',
+                image='recipes/images/generated.png',
+                cooking_time=self.rng.randint(5, 180),
+                author_id=author_id,
+                pub_date=self.timestamp(),
+                updated_at=self.now,
+            )
+            for recipe_id, author_id in zip(
+                recipe_ids, authors.sample(count)
+            )
+        ))
+        self.write(RecipeIngredient, (
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=self.rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in ingredients.sample_distinct(
+                max(1, self.amount(ingredients_per_recipe))
+            )
+        ))
+        self.write(Recipe.tags.through, (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in self.rng.sample(
+                tags, self.rng.randint(1, min(3, len(tags)))
+            )
+        ))
+        return recipe_ids
+
+    def generate_relations(self, model, field, users, targets, mean):
+        return self.write(model, (
+            model(user_id=user_id, **{field: target_id})
+            for user_id in users
+            for target_id in targets.sample_distinct(
+                self.amount(mean),
+                exclude=user_id if model is Follow else None
+            )
+        ))
+
+    def generate(self, users, recipes, ingredients, favorites, carts,
+                 follows):
+        if not Ingredient.objects.exists() or not Tag.objects.exists():
+            raise ValueError(
+                'Справочники пусты, сначала выполните load_csv.'
+            )
+        user_ids = self.generate_users(users)
+        authors = ZipfSampler(self.rng, user_ids)
+        recipe_ids = self.generate_recipes(recipes, authors, ingredients)
+        popular = ZipfSampler(self.rng, recipe_ids)
+        self.generate_relations(
+            Favorite, 'recipe_id', user_ids, popular, favorites
+        )
+        self.generate_relations(
+            ShoppingCart, 'recipe_id', user_ids, popular, carts
+        )
+        self.generate_relations(
+            Follow, 'author_id', user_ids, authors, follows
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                    no_style(), (User, Recipe)
+                ):
+                    cursor.execute(sql)
+        recount_counters()
+        rebuild_feed()
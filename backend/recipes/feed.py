@@ -0,0 +1,49 @@
+from django.db import connection
+
+from users.models import Follow
+from .models import FeedEntry, Recipe
+
+
+def copy_entries(condition='', params=(), models=None):
+    entry_model, follow_model, recipe_model = models or (
+        FeedEntry, Follow, Recipe
+    )
+    quote = connection.ops.quote_name
+    sql = (
+        f'INSERT INTO {quote(entry_model._meta.db_table)} '
+        '(user_id, recipe_id, author_id, pub_date) '
+        'SELECT follow.user_id, recipe.id, recipe.author_id, recipe.pub_date '
+        f'FROM {quote(follow_model._meta.db_table)} follow '
+        f'INNER JOIN {quote(recipe_model._meta.db_table)} recipe '
+        'ON recipe.author_id = follow.author_id'
+    )
+    if condition:
+        sql = f'{sql} WHERE {condition}'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def fan_out(recipe):
+    return copy_entries('recipe.id = %s', (recipe.pk,))
+
+
+def backfill(user_id, author_id):
+    return copy_entries(
+        'follow.user_id = %s AND follow.author_id = %s',
+        (user_id, author_id)
+    )
+
+
+def prune(user_id, author_id):
+    deleted, _ = FeedEntry.objects.filter(
+        user_id=user_id,
+        author_id=author_id
+    ).delete()
+    return deleted
+
+
+def rebuild_feed(models=None):
+    entry_model = models[0] if models else FeedEntry
+    entry_model.objects.all().delete()
+    return copy_entries(models=models)
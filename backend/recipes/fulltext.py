@@ -0,0 +1,147 @@
+import re
+
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
+
+from .constants import (SEARCH_CONFIG, SEARCH_FTS_SUFFIX, SEARCH_FTS_WEIGHTS,
+                        SEARCH_VECTOR_COLUMN)
+
+WORD_RE = re.compile(r'\w+')
+
+POSTGRESQL_INSTALL = (
+    'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} tsvector '
+    'GENERATED ALWAYS AS ('
+    "setweight(to_tsvector('{config}'::regconfig, coalesce(name, '')), 'A')"
+    " || setweight(to_tsvector('{config}'::regconfig, coalesce(text, '')),"
+    " 'B')) STORED",
+    'CREATE INDEX IF NOT EXISTS {index} ON {table} USING gin ({column})',
+)
+POSTGRESQL_UNINSTALL = (
+    'DROP INDEX IF EXISTS {index}',
+    'ALTER TABLE {table} DROP COLUMN IF EXISTS {column}',
+)
+SQLITE_INSTALL = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5('
+    "name, text, content='{table_name}', content_rowid='id')",
+    'CREATE TRIGGER IF NOT EXISTS {fts_name}_insert AFTER INSERT ON {table} '
+    'BEGIN INSERT INTO {fts}(rowid, name, text) '
+    'VALUES (new.id, new.name, new.text); END',
+    'CREATE TRIGGER IF NOT EXISTS {fts_name}_delete AFTER DELETE ON {table} '
+    "BEGIN INSERT INTO {fts}({fts}, rowid, name, text) "
+    "VALUES ('delete', old.id, old.name, old.text); END",
+    'CREATE TRIGGER IF NOT EXISTS {fts_name}_update '
+    'AFTER UPDATE OF name, text ON {table} '
+    "BEGIN INSERT INTO {fts}({fts}, rowid, name, text) "
+    "VALUES ('delete', old.id, old.name, old.text); "
+    'INSERT INTO {fts}(rowid, name, text) '
+    'VALUES (new.id, new.name, new.text); END',
+    "INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+)
+SQLITE_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS {fts_name}_insert',
+    'DROP TRIGGER IF EXISTS {fts_name}_delete',
+    'DROP TRIGGER IF EXISTS {fts_name}_update',
+    'DROP TABLE IF EXISTS {fts}',
+)
+STATEMENTS = {
+    'postgresql': (POSTGRESQL_INSTALL, POSTGRESQL_UNINSTALL),
+    'sqlite': (SQLITE_INSTALL, SQLITE_UNINSTALL),
+}
+
+
+def execute(schema_editor, model, install):
+    connection = schema_editor.connection
+    if connection.vendor not in STATEMENTS:
+        return
+    quote = connection.ops.quote_name
+    table_name = model._meta.db_table
+    fts_name = f'{table_name}{SEARCH_FTS_SUFFIX}'
+    names = {
+        'table': quote(table_name),
+        'table_name': table_name,
+        'column': SEARCH_VECTOR_COLUMN,
+        'config': SEARCH_CONFIG,
+        'index': quote(f'{table_name}_{SEARCH_VECTOR_COLUMN}_idx'),
+        'fts': quote(fts_name),
+        'fts_name': fts_name,
+    }
+    statements = STATEMENTS[connection.vendor][0 if install else 1]
+    for statement in statements:
+        schema_editor.execute(statement.format(**names))
+
+
+def install_index(schema_editor, model):
+    execute(schema_editor, model, install=True)
+
+
+def uninstall_index(schema_editor, model):
+    execute(schema_editor, model, install=False)
+
+
+def get_terms(query):
+    return WORD_RE.findall(query.casefold())
+
+
+def search_postgresql(queryset, query, quote):
+    column = f'{quote(queryset.model._meta.db_table)}.{SEARCH_VECTOR_COLUMN}'
+    tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+    return queryset.filter(
+        RawSQL(
+            f'{column} @@ {tsquery}',
+            (query,),
+            output_field=models.BooleanField()
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f'ts_rank_cd({column}, {tsquery})',
+            (query,),
+            output_field=models.FloatField()
+        )
+    )
+
+
+def search_sqlite(queryset, query, quote):
+    terms = get_terms(query)
+    if not terms:
+        return queryset.none().annotate(
+            search_rank=models.Value(0.0, output_field=models.FloatField())
+        )
+    table = queryset.model._meta.db_table
+    fts = quote(f'{table}{SEARCH_FTS_SUFFIX}')
+    match = ' '.join(f'"{term}"*' for term in terms)
+    weights = ', '.join(str(weight) for weight in SEARCH_FTS_WEIGHTS)
+    return queryset.filter(
+        pk__in=RawSQL(
+            f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s',
+            (match,)
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f'SELECT -bm25({fts}, {weights}) FROM {fts} '
+            f'WHERE {fts} MATCH %s AND rowid = {quote(table)}.id',
+            (match,),
+            output_field=models.FloatField()
+        )
+    )
+
+
+def search_fallback(queryset, query, quote):
+    return queryset.filter(
+        models.Q(name__icontains=query) | models.Q(text__icontains=query)
+    ).annotate(
+        search_rank=models.Value(0.0, output_field=models.FloatField())
+    )
+
+
+BACKENDS = {
+    'postgresql': search_postgresql,
+    'sqlite': search_sqlite,
+}
+
+
+def search(queryset, query):
+    connection = connections[queryset.db]
+    backend = BACKENDS.get(connection.vendor, search_fallback)
+    return backend(
+        queryset, query, connection.ops.quote_name
+    ).order_by('-search_rank', '-pub_date', '-id')
@@ -0,0 +1,50 @@
+import random
+
+from django.core.management import BaseCommand, CommandError
+
+from recipes.constants import GENERATOR_CHUNK_SIZE
+from recipes.data_generator import DataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Генерация пользователей, рецептов, избранного, покупок и подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients', type=int, default=10,
+                            help='Среднее число ингредиентов в рецепте')
+        parser.add_argument('--favorites', type=int, default=20,
+                            help='Среднее число избранных у пользователя')
+        parser.add_argument('--carts', type=int, default=5,
+                            help='Среднее число рецептов в покупках')
+        parser.add_argument('--follows', type=int, default=10,
+                            help='Среднее число подписок у пользователя')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int,
+                            default=GENERATOR_CHUNK_SIZE)
+        parser.add_argument('--password',
+                            help='Общий пароль для созданных пользователей')
+        parser.add_argument('--no-copy', action='store_true',
+                            help='Не использовать COPY на PostgreSQL')
+
+    def handle(self, *args, **options):
+        generator = DataGenerator(
+            random.Random(options['seed']),
+            chunk_size=options['chunk_size'],
+            log=self.stdout.write,
+            password=options['password'],
+            use_copy=False if options['no_copy'] else None,
+        )
+        try:
+            generator.generate(
+                options['users'],
+                options['recipes'],
+                options['ingredients'],
+                options['favorites'],
+                options['carts'],
+                options['follows'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS('Генерация данных завершена'))
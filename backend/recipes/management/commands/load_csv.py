@@ -1,47 +1,46 @@
-from csv import reader
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
 
-from django.core.management import BaseCommand
-
-from recipes.models import Ingredient, Tag
-
-
-TABLES_DICT = {
-    Ingredient: 'ingredients.csv',
-    Tag: 'tags.csv',
-}
+from recipes.cache import bump_version
+from recipes.catalog_loader import CATALOGS, READERS, CatalogLoader
+from recipes.constants import (CATALOG_CHUNK_SIZE, INGREDIENTS_NAMESPACE,
+                               TAGS_NAMESPACE)
 
 
 class Command(BaseCommand):
-    help = 'Загрузка данных из csv файлов'
+    help = 'Загрузка тегов и ингредиентов из csv или json файлов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='file_format', default='csv',
+                            choices=tuple(READERS))
+        parser.add_argument('--path', default=settings.BASE_DIR / 'data',
+                            help='Каталог с файлами справочников')
+        parser.add_argument('--chunk-size', type=int,
+                            default=CATALOG_CHUNK_SIZE)
 
     def handle(self, *args, **options):
-        for model_name, file_name in TABLES_DICT.items():
+        errors = 0
+        for model, (file_name, _, _) in CATALOGS.items():
+            path = f'{options["path"]}/{file_name}.{options["file_format"]}'
+            loader = CatalogLoader(
+                model,
+                options['file_format'],
+                chunk_size=options['chunk_size'],
+                log=self.stdout.write,
+                error=lambda message: self.stderr.write(
+                    self.style.ERROR(message)
+                ),
+            )
             try:
-                with open(
-                    f'./data/{file_name}',
-                    encoding='utf-8'
-                ) as csv_file:
-                    data_list = []
-                    data = reader(csv_file)
-                    for row_one, row_two in data:
-                        if 'tags.csv' in file_name:
-                            data_list.append(
-                                model_name(
-                                    name=row_one,
-                                    slug=row_two
-                                )
-                            )
-                        elif 'ingredients.csv' in file_name:
-                            data_list.append(
-                                model_name(
-                                    name=row_one,
-                                    measurement_unit=row_two
-                                )
-                            )
-                    model_name.objects.bulk_create(
-                        data_list,
-                        ignore_conflicts=True
-                    )
-            except Exception as error:
-                self.stdout.write(self.style.ERROR(f'{error}'))
-        self.stdout.write(self.style.SUCCESS('Загрузка данных завершена'))
+                stats = loader.load(path)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'{path}: {error}')
+            errors += stats['errors']
+            self.stdout.write(loader.progress())
+        bump_version(INGREDIENTS_NAMESPACE, TAGS_NAMESPACE)
+        if errors:
+            self.stdout.write(self.style.WARNING(
+                f'Загрузка данных завершена, пропущено строк: {errors}'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Загрузка данных завершена'))
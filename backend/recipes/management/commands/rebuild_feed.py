@@ -0,0 +1,15 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.feed import rebuild_feed
+
+
+class Command(BaseCommand):
+    help = 'Пересборка лент подписок из подписок и рецептов'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_feed()
+        self.stdout.write(
+            self.style.SUCCESS(f'Лента пересобрана, записей: {total}')
+        )
@@ -0,0 +1,12 @@
+from django.core.management import BaseCommand
+
+from recipes.counters import recount_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт счётчиков избранного, покупок, рецептов и подписчиков'
+
+    def handle(self, *args, **options):
+        for counter, repaired in recount_counters().items():
+            self.stdout.write(f'{counter}: исправлено записей {repaired}')
+        self.stdout.write(self.style.SUCCESS('Пересчёт счётчиков завершён'))
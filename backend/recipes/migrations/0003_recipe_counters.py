@@ -0,0 +1,46 @@
+# Generated by Django 3.2.3 on 2026-10-17 10:05
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    for field, related_name in (
+        ('favorites_count', 'Favorite'),
+        ('in_carts_count', 'ShoppingCart'),
+    ):
+        related_model = apps.get_model('recipes', related_name)
+        Recipe.objects.update(**{field: Coalesce(
+            Subquery(
+                related_model.objects.filter(
+                    recipe=OuterRef('pk')
+                ).order_by().values('recipe').annotate(
+                    total=Count('pk')
+                ).values('total'),
+                output_field=IntegerField()
+            ),
+            0
+        )})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_recipe_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлений в избранное'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлений в список покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
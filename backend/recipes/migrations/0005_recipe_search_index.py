@@ -0,0 +1,24 @@
+# Generated by Django 3.2.3 on 2026-10-17 12:10
+
+from django.db import migrations
+
+from recipes.fulltext import install_index, uninstall_index
+
+
+def install(apps, schema_editor):
+    install_index(schema_editor, apps.get_model('recipes', 'Recipe'))
+
+
+def uninstall(apps, schema_editor):
+    uninstall_index(schema_editor, apps.get_model('recipes', 'Recipe'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.3 on 2026-10-17 12:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from recipes.feed import rebuild_feed
+
+
+def fill_feed(apps, schema_editor):
+    rebuild_feed(models=(
+        apps.get_model('recipes', 'FeedEntry'),
+        apps.get_model('users', 'Follow'),
+        apps.get_model('recipes', 'Recipe'),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0003_user_avatar_variants'),
+        ('recipes', '0005_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор рецепта')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Лента подписок',
+                'ordering': ('-pub_date', '-recipe_id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-pub_date', '-recipe'], name='feedentry_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feedentry'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.3 on 2026-10-17 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShortLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.CharField(max_length=32, unique=True, verbose_name='Короткая ссылка')),
+                ('hits', models.PositiveIntegerField(default=0, editable=False, verbose_name='Переходов')),
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='short_link', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Короткая ссылка',
+                'verbose_name_plural': 'Короткие ссылки',
+                'ordering': ('-hits',),
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.3 on 2026-10-17 14:30
+
+from django.db import migrations, models
+import django.utils.timezone
+
+from recipes.fulltext import install_index
+
+
+def reinstall_search_index(apps, schema_editor):
+    install_index(schema_editor, apps.get_model('recipes', 'Recipe'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_shortlink'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop, reinstall_search_index
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Дата изменения'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            reinstall_search_index, migrations.RunPython.noop
+        ),
+    ]
@@ -1,9 +1,13 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 
 from .constants import (MIN_VALUE, INGREDIENT_LEN, MEASUREMENT_UNIT_LEN,
-                        RECIPE_LEN, TAG_LEN, SLICE_LENGTH, MAX_VALUE)
+                        RECIPE_LEN, TAG_LEN, SLICE_LENGTH, MAX_VALUE,
+                        SHORT_LINK_LEN)
+from .fulltext import search
 
 
 User = get_user_model()
@@ -57,6 +61,85 @@ class Ingredient(models.Model):
         return self.name[:SLICE_LENGTH]
 
 
+class RecipeQuerySet(models.QuerySet):
+
+    def with_related(self):
+        return self.select_related(
+            'author'
+        ).prefetch_related(
+            'tags',
+            models.Prefetch(
+                'recipeingredient_set',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=models.Value(
+                    False, output_field=models.BooleanField()
+                ),
+                is_in_shopping_cart=models.Value(
+                    False, output_field=models.BooleanField()
+                ),
+            )
+        return self.annotate(
+            is_favorited=models.Exists(
+                Favorite.objects.filter(
+                    user=user,
+                    recipe=models.OuterRef('pk')
+                )
+            ),
+            is_in_shopping_cart=models.Exists(
+                ShoppingCart.objects.filter(
+                    user=user,
+                    recipe=models.OuterRef('pk')
+                )
+            ),
+        )
+
+    def for_read(self, user):
+        return self.with_related().with_user_flags(user)
+
+    def search(self, query):
+        return search(self, query)
+
+    def latest_by_author(self, author_ids, limit=None):
+        queryset = self.filter(author_id__in=author_ids)
+        ordering = ('-pub_date', '-id')
+        if limit is None:
+            return queryset.order_by(*ordering)
+        if connections[self.db].features.supports_over_clause:
+            ranked = queryset.annotate(
+                recipe_rank=models.Window(
+                    expression=RowNumber(),
+                    partition_by=(models.F('author_id'),),
+                    order_by=(
+                        models.F('pub_date').desc(),
+                        models.F('id').desc(),
+                    ),
+                )
+            ).order_by().values('id', 'recipe_rank')
+            sql, params = ranked.query.sql_with_params()
+            return queryset.filter(
+                pk__in=RawSQL(
+                    f'SELECT ranked.id FROM ({sql}) AS ranked '
+                    'WHERE ranked.recipe_rank <= %s',
+                    (*params, limit)
+                )
+            ).order_by(*ordering)
+        return queryset.filter(
+            pk__in=models.Subquery(
+                self.model.objects.filter(
+                    author_id=models.OuterRef('author_id')
+                ).order_by(*ordering).values('pk')[:limit]
+            )
+        ).order_by(*ordering)
+
+
 class Recipe(models.Model):
     name = models.CharField(
         verbose_name='Название рецепта',
@@ -74,6 +157,12 @@ class Recipe(models.Model):
         verbose_name='Картинка рецепта',
         upload_to='recipes/images/',
     )
+    image_variants = models.JSONField(
+        verbose_name='Варианты картинки',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     ingredients = models.ManyToManyField(
         Ingredient,
         verbose_name='Список ингредиентов',
@@ -101,6 +190,22 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в избранное',
+        default=0,
+        editable=False,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в список покупок',
+        default=0,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
@@ -112,6 +217,12 @@ class Recipe(models.Model):
                 name='unique_recipe',
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('-pub_date', 'id',),
+                name='recipe_pub_date_id_idx',
+            ),
+        )
 
     def __str__(self):
         return self.name[:SLICE_LENGTH]
@@ -186,6 +297,7 @@ class UserRecipe(models.Model):
 
 
 class Favorite(UserRecipe):
+    counter_field = 'favorites_count'
 
     class Meta(UserRecipe.Meta):
         ordering = ('id',)
@@ -195,8 +307,80 @@ class Favorite(UserRecipe):
 
 
 class ShoppingCart(UserRecipe):
+    counter_field = 'in_carts_count'
 
     class Meta(UserRecipe.Meta):
         verbose_name = 'Список Покупок'
         verbose_name_plural = 'Списки Покупок'
         default_related_name = 'shoppingcart_set'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор рецепта',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        ordering = ('-pub_date', '-recipe_id')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe',),
+                name='unique_feedentry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe',),
+                name='feedentry_user_pub_date_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} {self.recipe}'[:SLICE_LENGTH]
+
+
+class ShortLink(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='short_link',
+    )
+    slug = models.CharField(
+        verbose_name='Короткая ссылка',
+        max_length=SHORT_LINK_LEN,
+        unique=True,
+    )
+    hits = models.PositiveIntegerField(
+        verbose_name='Переходов',
+        default=0,
+        editable=False,
+    )
+
+    class Meta:
+        verbose_name = 'Короткая ссылка'
+        verbose_name_plural = 'Короткие ссылки'
+        ordering = ('-hits',)
+
+    def __str__(self):
+        return self.slug
@@ -0,0 +1,129 @@
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+import short_url
+from django.db import connections, transaction
+from django.db.models import F
+
+from .cache import LocalCache
+from .constants import (SHORT_LINK_CACHE_SIZE, SHORT_LINK_CACHE_TTL,
+                        SHORT_LINK_FLUSH_INTERVAL, SHORT_LINK_FLUSH_SIZE)
+from .models import Recipe, ShortLink
+
+
+logger = logging.getLogger(__name__)
+
+ALPHABET = frozenset(short_url.DEFAULT_ALPHABET)
+
+
+class HitBuffer:
+
+    def __init__(self, flush_size, flush_interval):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.hits = Counter()
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def take(self):
+        hits, self.hits = self.hits, Counter()
+        self.pending = 0
+        return hits
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(
+                target=self.run, name='short-link-hits', daemon=True
+            )
+            self.thread.start()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                connections.close_all()
+
+    def add(self, link_id):
+        with self.lock:
+            self.start()
+            self.hits[link_id] += 1
+            self.pending += 1
+            if self.pending >= self.flush_size:
+                self.wakeup.set()
+
+    def flush(self):
+        with self.lock:
+            hits = self.take()
+        self.write(hits)
+
+    @staticmethod
+    def write(hits):
+        if not hits:
+            return
+        by_count = defaultdict(list)
+        for link_id, count in hits.items():
+            by_count[count].append(link_id)
+        try:
+            with transaction.atomic():
+                for count, link_ids in by_count.items():
+                    ShortLink.objects.filter(pk__in=link_ids).update(
+                        hits=F('hits') + count
+                    )
+        except Exception:
+            logger.exception(
+                'Не удалось сохранить переходы по %s ссылкам', len(hits)
+            )
+
+
+link_cache = LocalCache(SHORT_LINK_CACHE_SIZE, SHORT_LINK_CACHE_TTL)
+hit_buffer = HitBuffer(SHORT_LINK_FLUSH_SIZE, SHORT_LINK_FLUSH_INTERVAL)
+atexit.register(hit_buffer.flush)
+
+
+def is_valid_slug(slug):
+    return ALPHABET.issuperset(slug)
+
+
+def get_or_create_link(recipe):
+    link, _ = ShortLink.objects.get_or_create(
+        recipe=recipe,
+        defaults={'slug': short_url.encode_url(recipe.pk)}
+    )
+    return link
+
+
+def load_link(slug):
+    link = ShortLink.objects.filter(slug=slug).values_list(
+        'pk', 'recipe_id'
+    ).first()
+    if link is not None:
+        return link
+    try:
+        recipe = Recipe.objects.filter(
+            pk=short_url.decode_url(slug)
+        ).only('pk').first()
+    except (ValueError, OverflowError):
+        return None
+    if recipe is None:
+        return None
+    link = get_or_create_link(recipe)
+    return link.pk, link.recipe_id
+
+
+def resolve(slug):
+    link = link_cache.get(slug)
+    if link is None:
+        link = load_link(slug)
+        if link is None:
+            return None
+        link_cache.set(slug, link)
+    link_id, recipe_id = link
+    hit_buffer.add(link_id)
+    return recipe_id
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_version, recipe_namespaces, user_namespaces
+from .constants import INGREDIENTS_NAMESPACE, TAGS_NAMESPACE
+from .models import Ingredient, Recipe, ShortLink, Tag
+from .short_links import link_cache
+
+
+User = get_user_model()
+
+LOGIN_FIELDS = frozenset(('last_login',))
+
+
+def bump_on_commit(*namespaces):
+    transaction.on_commit(lambda: bump_version(*namespaces))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_changed(sender, **kwargs):
+    bump_on_commit(INGREDIENTS_NAMESPACE)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, **kwargs):
+    bump_on_commit(TAGS_NAMESPACE)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    bump_on_commit(*recipe_namespaces(instance.pk))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        bump_on_commit(TAGS_NAMESPACE)
+    else:
+        bump_on_commit(*recipe_namespaces(instance.pk))
+
+
+@receiver(post_delete, sender=ShortLink)
+def short_link_deleted(sender, instance, **kwargs):
+    link_cache.discard(instance.slug)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and set(update_fields) <= LOGIN_FIELDS):
+        return
+    bump_on_commit(*user_namespaces(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    bump_on_commit(*user_namespaces(instance.pk))
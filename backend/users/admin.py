@@ -15,6 +15,8 @@ class UserAdmin(BaseUserAdmin):
         'first_name',
         'last_name',
         'user_avatar',
+        'recipes_count',
+        'followers_count',
     )
     list_display_links = (
         'username',
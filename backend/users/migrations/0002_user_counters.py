@@ -0,0 +1,47 @@
+# Generated by Django 3.2.3 on 2026-10-17 10:05
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    for field, app_label, related_name in (
+        ('recipes_count', 'recipes', 'Recipe'),
+        ('followers_count', 'users', 'Follow'),
+    ):
+        related_model = apps.get_model(app_label, related_name)
+        User.objects.update(**{field: Coalesce(
+            Subquery(
+                related_model.objects.filter(
+                    author=OuterRef('pk')
+                ).order_by().values('author').annotate(
+                    total=Count('pk')
+                ).values('total'),
+                output_field=IntegerField()
+            ),
+            0
+        )})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
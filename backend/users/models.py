@@ -23,6 +23,12 @@ class User(AbstractUser):
         null=True,
         blank=True,
     )
+    avatar_variants = models.JSONField(
+        verbose_name='Варианты аватара',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     email = models.EmailField(
         verbose_name='Адрес электронной почты',
         unique=True
@@ -35,6 +41,20 @@ class User(AbstractUser):
         verbose_name='Фамилия',
         max_length=MAX_LENGTH,
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
 
     class Meta:
         ordering = ('username',)